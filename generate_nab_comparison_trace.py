@@ -1,6 +1,5 @@
 import pandas as pd
 import yaml
-from datetime import datetime
 from htm_py.htm_model import HTMModel
 import matplotlib.pyplot as plt
 
@@ -18,13 +17,15 @@ with open(f"config/NAB_{dataset}.yaml", "r") as f:
 
 model = HTMModel(config)
 
+# Parse every timestamp once instead of calling strptime per row
+timestamps = pd.to_datetime(df["timestamp"], format="%Y-%m-%d %H:%M:%S")
+
 # === Compute your model scores ===
 rows = []
 for i, row in df.iterrows():
     if i >= len(ref_scores): break
 
-    ts = datetime.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S")
-    input_row = {"value": row["value"], "timestamp": ts}
+    input_row = {"value": row["value"], "timestamp": timestamps[i]}
     anomaly_score, pred_count = model.compute(input_row, learn=True)
 
     print(f"time={i} htm_py: {round(anomaly_score,3)}; numenta: {round(ref_scores[i],3)}")
@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class CellSet:
+    """
+    Set of cell indices backed by a preallocated boolean mask plus an index
+    array of its members.
+
+    Supports the subset of the `set` API TemporalMemory uses (`add`, `update`,
+    `clear`, `in`, `len`, iteration), so it can replace a Python set of cells.
+    Membership for a whole batch of cells is a single fancy-index:
+    `cell_set.mask[cells]`.
+
+    Args:
+        num_cells (int): Total number of cells; members lie in [0, num_cells).
+        cells (iterable of int): Initial members.
+    """
+
+    __slots__ = ("mask", "_indices", "_count")
+
+    def __init__(self, num_cells, cells=()):
+        self.mask = np.zeros(num_cells, dtype=bool)
+        self._indices = np.empty(num_cells, dtype=np.int64)
+        self._count = 0
+        self.update(cells)
+
+    @property
+    def indices(self):
+        """np.ndarray of int: Member cells in insertion order (a view, do not modify)."""
+        return self._indices[:self._count]
+
+    def add(self, cell):
+        if not self.mask[cell]:
+            self.mask[cell] = True
+            self._indices[self._count] = cell
+            self._count += 1
+
+    def update(self, cells):
+        """
+        Add many cells at once.
+
+        Args:
+            cells (iterable of int): Cells to add; duplicates are ignored.
+        """
+        if isinstance(cells, CellSet):
+            cells = cells.indices
+        elif not isinstance(cells, np.ndarray):
+            cells = np.fromiter(cells, dtype=np.int64)
+        cells = np.unique(cells[~self.mask[cells]])
+        self.mask[cells] = True
+        self._indices[self._count:self._count + len(cells)] = cells
+        self._count += len(cells)
+
+    def clear(self):
+        # Only the members are reset, so clearing costs O(len(self))
+        self.mask[self.indices] = False
+        self._count = 0
+
+    def __contains__(self, cell):
+        return bool(self.mask[cell])
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.indices.tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, CellSet):
+            other = set(other)
+        return set(self) == other
+
+    def __repr__(self):
+        return f"CellSet({sorted(self)})"
+
+
+def as_cell_array(cells):
+    """
+    Return the members of a cell collection as an index array, without
+    copying when `cells` is a `CellSet` or already an array.
+
+    Args:
+        cells (CellSet, np.ndarray or iterable of int): Cell collection.
+
+    Returns:
+        np.ndarray of int: Cell indices.
+    """
+    if isinstance(cells, CellSet):
+        return cells.indices
+    if isinstance(cells, np.ndarray):
+        return cells
+    return np.fromiter(cells, dtype=np.int64, count=len(cells))
@@ -1,20 +1,340 @@
-import os
 import numpy as np
+from collections.abc import Mapping
+from htm_py.cell_state import CellSet, as_cell_array
+from htm_py.tracing import NULL_TRACER
+
+
+class _SynapseDataView(Mapping):
+    """
+    Read-only ``{synapse_id: (presynaptic_cell, permanence)}`` view over the
+    array storage, kept so existing callers of ``Connections.synapse_data``
+    continue to work.
+    """
+
+    def __init__(self, connections):
+        self._connections = connections
+
+    def __getitem__(self, synapse_id):
+        if synapse_id not in self:
+            raise KeyError(synapse_id)
+        return self._connections.synapse_data_for(synapse_id)
+
+    def __contains__(self, synapse_id):
+        c = self._connections
+        return (
+            isinstance(synapse_id, (int, np.integer))
+            and 0 <= synapse_id < c._num_synapse_slots
+            and c._synapse_segments[synapse_id] >= 0
+        )
+
+    def __iter__(self):
+        c = self._connections
+        return iter(np.flatnonzero(c._synapse_segments[:c._num_synapse_slots] >= 0).tolist())
+
+    def __len__(self):
+        return self._connections._num_synapses
+
+
+class _SegmentSynapsesView(Mapping):
+    """
+    Read-only ``{segment_id: [synapse IDs]}`` view over the pooled segment
+    index, kept so existing callers of ``Connections.segment_to_synapses``
+    continue to work.
+    """
+
+    def __init__(self, connections):
+        self._connections = connections
+
+    def __getitem__(self, segment_id):
+        if segment_id not in self:
+            raise KeyError(segment_id)
+        return self._connections.synapses_for_segment(segment_id)
+
+    def __contains__(self, segment_id):
+        return self._connections._segment_exists(segment_id)
+
+    def __iter__(self):
+        return iter(self._connections.segments())
+
+    def __len__(self):
+        return self._connections._num_segments
+
+
+def _concat_ranges(starts, counts):
+    """
+    Args:
+        starts (np.ndarray of int): Start of each range.
+        counts (np.ndarray of int): Length of each range.
+
+    Returns:
+        np.ndarray of int: The ranges [start, start + count) concatenated.
+    """
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(offsets.size)
+
+
+class _SlotLists:
+    """
+    Growable lists of int32 values (synapse IDs) keyed by a small integer
+    (segment or presynaptic cell), all stored in one pooled array.
+
+    List `key` is ``values[starts[key]:starts[key] + lengths[key]]``, inside a
+    block of ``capacities[key]`` slots. A list that outgrows its block moves
+    to a larger block at the end of the pool. A full pool is repacked when
+    abandoned blocks take up a quarter of it, and doubled otherwise. Removal
+    swaps the last item into the freed position, like `_swap_remove`.
+    """
+
+    MIN_CAPACITY = 4
+
+    def __init__(self, num_keys=0):
+        self.values = np.zeros(0, dtype=np.int32)
+        self.starts = np.zeros(num_keys, dtype=np.int64)
+        self.lengths = np.zeros(num_keys, dtype=np.int32)
+        self.capacities = np.zeros(num_keys, dtype=np.int32)
+        # Pool slots handed out to blocks, live or abandoned
+        self._used = 0
+
+    @classmethod
+    def grouped(cls, keys, positions, num_keys):
+        """
+        Build lists holding item indices 0..len(keys)-1, grouped by key and
+        ordered within each list by the items' previous positions.
+
+        Args:
+            keys (np.ndarray of int): Key per item.
+            positions (np.ndarray of int): Previous position of each item in its list.
+            num_keys (int): Number of keys to allocate.
+
+        Returns:
+            (_SlotLists, np.ndarray): The lists, and each item's new position.
+        """
+        lists = cls(num_keys)
+        order = np.lexsort((positions, keys))
+        counts = np.bincount(keys, minlength=num_keys).astype(np.int32)
+        lists.values = order.astype(np.int32)
+        lists.lengths[:] = counts
+        lists.capacities[:] = counts
+        lists.starts[:] = np.cumsum(counts, dtype=np.int64) - counts
+        lists._used = len(keys)
+
+        new_positions = np.empty(len(keys), dtype=np.int32)
+        new_positions[order] = np.arange(len(keys)) - lists.starts[keys[order]]
+        return lists, new_positions
+
+    @property
+    def nbytes(self):
+        """int: Memory held by the pool and the per-key arrays."""
+        return self.values.nbytes + self.starts.nbytes + self.lengths.nbytes + self.capacities.nbytes
+
+    def reserve_keys(self, num_keys):
+        """Make room for keys below `num_keys`."""
+        extra = num_keys - len(self.starts)
+        if extra <= 0:
+            return
+        extra = max(extra, len(self.starts))
+        self.starts = np.concatenate([self.starts, np.zeros(extra, dtype=np.int64)])
+        self.lengths = np.concatenate([self.lengths, np.zeros(extra, dtype=np.int32)])
+        self.capacities = np.concatenate([self.capacities, np.zeros(extra, dtype=np.int32)])
+
+    def get(self, key):
+        """
+        Returns:
+            np.ndarray of int32: View of list `key`, invalidated by the next update.
+        """
+        if key >= len(self.starts):
+            return self.values[:0]
+        start = self.starts[key]
+        return self.values[start:start + self.lengths[key]]
+
+    def gather(self, keys):
+        """
+        Args:
+            keys (np.ndarray of int): Keys; unknown keys hold empty lists.
+
+        Returns:
+            np.ndarray of int32: The lists of `keys` concatenated in order.
+        """
+        keys = keys[keys < len(self.starts)]
+        return self.values[_concat_ranges(self.starts[keys], self.lengths[keys])]
+
+    def append_one(self, key, value):
+        """
+        Returns:
+            int: Position of `value` in list `key`.
+        """
+        self.reserve_keys(key + 1)
+        length = int(self.lengths[key])
+        if length == self.capacities[key]:
+            self._move(key, length + 1)
+        self.values[self.starts[key] + length] = value
+        self.lengths[key] = length + 1
+        return length
+
+    def append(self, keys, values):
+        """
+        Append `values[i]` to list `keys[i]` for every i, in order.
+
+        Returns:
+            np.ndarray of int: Position of each value in its list.
+        """
+        self.reserve_keys(int(keys.max()) + 1)
+        unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        needed = self.lengths[unique] + counts
+        full = needed > self.capacities[unique]
+        for key, size in zip(unique[full].tolist(), needed[full].tolist()):
+            self._move(key, size)
+
+        # Rank of each value among the values appended to the same list
+        order = np.argsort(inverse, kind="stable")
+        ranks = np.empty(len(keys), dtype=np.int64)
+        ranks[order] = np.arange(len(keys)) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = self.lengths[keys] + ranks
+        self.values[self.starts[keys] + positions] = values
+        self.lengths[unique] += counts.astype(np.int32)
+        return positions
+
+    def remove(self, key, position, positions):
+        """
+        Remove the value at `position` of list `key` by moving the last value
+        into its place.
+
+        Args:
+            key (int): List key.
+            position (int): Position to remove.
+            positions (np.ndarray): Per-value position in its list, kept in sync.
+        """
+        last = int(self.lengths[key]) - 1
+        self.lengths[key] = last
+        if position < last:
+            start = int(self.starts[key])
+            moved = self.values[start + last]
+            self.values[start + position] = moved
+            positions[moved] = position
+
+    def _move(self, key, min_capacity):
+        old_capacity = int(self.capacities[key])
+        capacity = max(min_capacity, 2 * old_capacity, self.MIN_CAPACITY)
+        self._reserve(capacity)
+        start = int(self.starts[key])
+        if start + old_capacity == self._used:
+            # Last block of the pool: extend it in place
+            self._used = start + capacity
+        else:
+            length = int(self.lengths[key])
+            self.values[self._used:self._used + length] = self.values[start:start + length]
+            self.starts[key] = self._used
+            self._used += capacity
+        self.capacities[key] = capacity
+
+    def _reserve(self, count):
+        if self._used + count <= len(self.values):
+            return
+        live = int(self.capacities.sum(dtype=np.int64))
+        if 4 * (self._used - live) >= len(self.values):
+            self._repack(live)
+        if self._used + count > len(self.values):
+            extra = max(len(self.values), self._used + count - len(self.values))
+            self.values = np.concatenate([self.values, np.zeros(extra, dtype=np.int32)])
+
+    def _repack(self, live):
+        starts = np.cumsum(self.capacities, dtype=np.int64) - self.capacities
+        values = np.zeros(len(self.values), dtype=np.int32)
+        values[_concat_ranges(starts, self.lengths)] = self.values[_concat_ranges(self.starts, self.lengths)]
+        self.values = values
+        self.starts = starts
+        self._used = live
+
+
+def _swap_remove(items, position, positions):
+    """
+    Remove `items[position]` in O(1) by moving the last item into its place.
+
+    Args:
+        items (list of int): List to remove from.
+        position (int): Index of the item to remove.
+        positions (np.ndarray): Per-item index into `items`, kept in sync.
+    """
+    last = items.pop()
+    if position < len(items):
+        items[position] = last
+        positions[last] = position
+
+
+def _group_in_order(keys, positions):
+    """
+    Group item indices by key, ordering each group by the items' previous positions.
+
+    Args:
+        keys (np.ndarray of int): Group key per item (segment, cell, ...).
+        positions (np.ndarray of int): Previous position of each item in its group.
+
+    Returns:
+        (np.ndarray, dict): New position of each item in its group, and
+        {key: list of item indices}.
+    """
+    order = np.lexsort((positions, keys))
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+
+    new_positions = np.empty(len(keys), dtype=np.int32)
+    new_positions[order] = np.arange(len(keys)) - np.repeat(starts, np.diff(np.append(starts, len(keys))))
+    groups = np.split(order, starts[1:])
+    return new_positions, {key: group.tolist() for key, group in zip(unique_keys.tolist(), groups)}
+
 
 class Connections:
-    def __init__(self):
+    def __init__(self, synapse_capacity=1024, segment_capacity=256, tracer=None, rng=None):
         # Maps each cell to its list of segments
         self.cell_to_segments = {}
 
-        # Maps each segment to a list of synapse data structures
-        self.segment_to_synapses = {}
+        # Segment -> synapse IDs, pooled in typed arrays
+        self._segment_synapses = _SlotLists(segment_capacity)
+        self.segment_to_synapses = _SegmentSynapsesView(self)
+
+        # Synapse storage (structure of arrays): synapse ID i lives in slot i.
+        # A slot whose owning segment is -1 is free.
+        self._presynaptic_cells = np.zeros(synapse_capacity, dtype=np.int32)
+        self._permanences = np.zeros(synapse_capacity, dtype=np.float32)
+        self._synapse_segments = np.full(synapse_capacity, -1, dtype=np.int32)
+
+        # Position of each synapse in its segment's list and in its
+        # presynaptic cell's list, so removal is a constant-time swap
+        self._synapse_positions = np.zeros(synapse_capacity, dtype=np.int32)
+        self._presynaptic_positions = np.zeros(synapse_capacity, dtype=np.int32)
 
-        # Synapse data: {synapse_id: (presynaptic_cell, permanence)}
-        self.synapse_data = {}
+        # Slots released by destroy_synapse, reused before new slots are taken
+        self._free_synapses = []
+        self._num_synapse_slots = 0
 
-        # Internal counters for unique segment and synapse IDs
+        # Running totals kept up to date on create, adapt and destroy (see stats())
+        self._num_segments = 0
+        self._num_synapses = 0
+        self._permanence_sum = 0.0
+
+        # Reverse index: presynaptic cell -> outgoing synapse IDs
+        self._presynaptic_synapses = _SlotLists()
+
+        # Legacy {synapse_id: (presynaptic_cell, permanence)} view
+        self.synapse_data = _SynapseDataView(self)
+
+        # Segment storage: owning cell (-1 if free) and position in that
+        # cell's segment list. Destroyed segment IDs are reused.
+        self._segment_cells = np.full(segment_capacity, -1, dtype=np.int32)
+        self._segment_positions = np.zeros(segment_capacity, dtype=np.int32)
+        self._free_segments = []
+
+        # Last iteration each segment was active, reinforced or created (LRU eviction)
+        self._segment_last_used = np.zeros(segment_capacity, dtype=np.int64)
+
+        # Number of segment IDs handed out so far (live or free)
         self._segment_id_counter = 0
-        self._synapse_id_counter = 0
+
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+
+        # Random source for synapse growth: the owning model's RandomState,
+        # or the global NumPy state when used on its own
+        self.rng = rng if rng is not None else np.random
 
 
     def create_segment(self, cell):
@@ -27,15 +347,53 @@ class Connections:
         Returns:
             int: New segment ID.
         """
-        segment_id = self._segment_id_counter
-        self._segment_id_counter += 1
-
-        self.cell_to_segments.setdefault(cell, []).append(segment_id)
-        self.segment_to_synapses[segment_id] = []
+        if self._free_segments:
+            segment_id = self._free_segments.pop()
+        else:
+            if self._segment_id_counter == len(self._segment_cells):
+                self._grow_segment_storage()
+            segment_id = self._segment_id_counter
+            self._segment_id_counter += 1
+
+        segments = self.cell_to_segments.setdefault(cell, [])
+        self._segment_cells[segment_id] = cell
+        self._segment_positions[segment_id] = len(segments)
+        segments.append(segment_id)
+        self._segment_synapses.reserve_keys(segment_id + 1)
+        self._num_segments += 1
+        self._segment_last_used[segment_id] = 0
 
         return segment_id
 
 
+    def record_segment_usage(self, segments, iteration):
+        """
+        Mark segments as used at the given iteration.
+
+        Args:
+            segments (iterable of int): Segment IDs.
+            iteration (int): Current timestep.
+        """
+        segments = np.fromiter(segments, dtype=np.int64)
+        self._segment_last_used[segments] = iteration
+
+
+    def least_recently_used_segment(self, cell):
+        """
+        Returns the segment on a cell that was used least recently.
+
+        Args:
+            cell (int): Cell index.
+
+        Returns:
+            int: Segment ID, or None if the cell has no segments.
+        """
+        segments = self.segments_for_cell(cell)
+        if not segments:
+            return None
+        return segments[int(np.argmin(self._segment_last_used[segments]))]
+
+
     def create_synapse(self, segment, presynaptic_cell, initial_permanence):
         """
         Create a new synapse on a segment.
@@ -48,15 +406,70 @@ class Connections:
         Returns:
             int: New synapse ID.
         """
-        synapse_id = self._synapse_id_counter
-        self._synapse_id_counter += 1
-
-        self.synapse_data[synapse_id] = (presynaptic_cell, initial_permanence)
-        self.segment_to_synapses[segment].append(synapse_id)
+        if not self._segment_exists(segment):
+            raise KeyError(segment)
+        if self._free_synapses:
+            synapse_id = self._free_synapses.pop()
+        else:
+            if self._num_synapse_slots == len(self._permanences):
+                self._grow_synapse_storage()
+            synapse_id = self._num_synapse_slots
+            self._num_synapse_slots += 1
+
+        self._presynaptic_cells[synapse_id] = presynaptic_cell
+        self._permanences[synapse_id] = initial_permanence
+        self._synapse_segments[synapse_id] = segment
+        self._num_synapses += 1
+        self._permanence_sum += float(self._permanences[synapse_id])
+
+        self._synapse_positions[synapse_id] = self._segment_synapses.append_one(segment, synapse_id)
+        self._presynaptic_positions[synapse_id] = self._presynaptic_synapses.append_one(
+            presynaptic_cell, synapse_id)
 
         return synapse_id
 
 
+    def _grow_synapse_storage(self):
+        """
+        Double the capacity of the synapse arrays, preserving existing slots.
+        """
+        extra = max(len(self._permanences), 1)
+        self._presynaptic_cells = np.concatenate(
+            [self._presynaptic_cells, np.zeros(extra, dtype=np.int32)])
+        self._permanences = np.concatenate(
+            [self._permanences, np.zeros(extra, dtype=np.float32)])
+        self._synapse_segments = np.concatenate(
+            [self._synapse_segments, np.full(extra, -1, dtype=np.int32)])
+        self._synapse_positions = np.concatenate(
+            [self._synapse_positions, np.zeros(extra, dtype=np.int32)])
+        self._presynaptic_positions = np.concatenate(
+            [self._presynaptic_positions, np.zeros(extra, dtype=np.int32)])
+
+
+    def _grow_segment_storage(self):
+        """
+        Double the capacity of the segment arrays, preserving existing slots.
+        """
+        extra = max(len(self._segment_cells), 1)
+        self._segment_cells = np.concatenate(
+            [self._segment_cells, np.full(extra, -1, dtype=np.int32)])
+        self._segment_positions = np.concatenate(
+            [self._segment_positions, np.zeros(extra, dtype=np.int32)])
+        self._segment_last_used = np.concatenate(
+            [self._segment_last_used, np.zeros(extra, dtype=np.int64)])
+
+
+    def permanences(self):
+        """
+        Returns the permanences of all existing synapses.
+
+        Returns:
+            np.ndarray of float32: One permanence per synapse.
+        """
+        live = self._synapse_segments[:self._num_synapse_slots] >= 0
+        return self._permanences[:self._num_synapse_slots][live]
+
+
     def segments_for_cell(self, cell):
         """
         Returns all segments associated with a given cell.
@@ -80,7 +493,20 @@ class Connections:
         Returns:
             list of int: Synapse IDs.
         """
-        return self.segment_to_synapses.get(segment, [])
+        return self._segment_synapses.get(segment).tolist()
+
+
+    def synapses_for_presynaptic_cell(self, cell):
+        """
+        Returns all synapses that receive input from a given cell.
+
+        Args:
+            cell (int): Presynaptic cell index.
+
+        Returns:
+            list of int: Synapse IDs.
+        """
+        return self._presynaptic_synapses.get(cell).tolist()
 
 
     def num_segments(self, cell):
@@ -106,7 +532,36 @@ class Connections:
         Returns:
             (int, float): (Presynaptic cell index, permanence value)
         """
-        return self.synapse_data[synapse_id]
+        if synapse_id not in self.synapse_data:
+            raise KeyError(synapse_id)
+        return int(self._presynaptic_cells[synapse_id]), float(self._permanences[synapse_id])
+
+
+    def _active_presynaptic_mask(self, synapses, active_cells):
+        """
+        Boolean mask over `synapses` marking those whose presynaptic cell is active.
+
+        Args:
+            synapses (array-like of int): Synapse IDs.
+            active_cells (CellSet, bool mask or iterable of int): Active cells.
+
+        Returns:
+            np.ndarray of bool: One entry per synapse.
+        """
+        presynaptic = self._presynaptic_cells[synapses]
+        if isinstance(active_cells, CellSet):
+            return active_cells.mask[presynaptic]
+        if isinstance(active_cells, np.ndarray) and active_cells.dtype == bool:
+            return active_cells[presynaptic]
+        if isinstance(active_cells, (set, frozenset)):
+            # Hash lookups beat np.isin's sort for the short per-segment batches
+            return np.fromiter(
+                (cell in active_cells for cell in presynaptic.tolist()),
+                dtype=bool, count=len(presynaptic)
+            )
+        if not isinstance(active_cells, np.ndarray):
+            active_cells = np.asarray(list(active_cells), dtype=np.int64)
+        return np.isin(presynaptic, active_cells)
 
 
     def num_active_connected_synapses(self, segment, active_cells, connected_permanence):
@@ -121,12 +576,12 @@ class Connections:
         Returns:
             int: Number of active connected synapses.
         """
-        count = 0
-        for synapse in self.synapses_for_segment(segment):
-            presynaptic_cell, permanence = self.synapse_data_for(synapse)
-            if permanence >= connected_permanence and presynaptic_cell in active_cells:
-                count += 1
-        return count
+        synapses = self._segment_synapses.get(segment)
+        if synapses.size == 0:
+            return 0
+        active = self._active_presynaptic_mask(synapses, active_cells)
+        connected = self._permanences[synapses] >= connected_permanence
+        return int(np.count_nonzero(active & connected))
 
 
     def num_active_potential_synapses(self, segment, active_cells):
@@ -140,29 +595,91 @@ class Connections:
         Returns:
             int: Number of active potential synapses.
         """
-        count = 0
-        for synapse in self.synapses_for_segment(segment):
-            presynaptic_cell, _ = self.synapse_data_for(synapse)
-            if presynaptic_cell in active_cells:
-                count += 1
-        return count
+        synapses = self._segment_synapses.get(segment)
+        if synapses.size == 0:
+            return 0
+        return int(np.count_nonzero(self._active_presynaptic_mask(synapses, active_cells)))
+
+
+    def compute_activity(self, active_cells, connected_permanence):
+        """
+        Count active connected and active potential synapses for every segment
+        in a single pass over the outgoing synapses of the active cells.
+
+        Only segments that receive input from `active_cells` are touched, so the
+        cost scales with activity rather than with model size.
+
+        Args:
+            active_cells (CellSet, np.ndarray or collection of int): Currently active cells.
+            connected_permanence (float): Permanence threshold for connection.
+
+        Returns:
+            (np.ndarray, np.ndarray): Active connected and active potential
+            synapse counts, both indexed by segment ID.
+        """
+        num_segment_ids = self._segment_id_counter
+        synapses = self._presynaptic_synapses.gather(as_cell_array(active_cells))
+        if synapses.size == 0:
+            empty = np.zeros(num_segment_ids, dtype=np.int32)
+            return empty, empty.copy()
+
+        segments = self._synapse_segments[synapses]
+        connected = self._permanences[synapses] >= connected_permanence
+
+        num_active_potential = np.bincount(segments, minlength=num_segment_ids)
+        num_active_connected = np.bincount(segments[connected], minlength=num_segment_ids)
+        return num_active_connected, num_active_potential
 
 
     def adapt_segment(self, segment, prev_active_cells, permanence_increment, permanence_decrement, iteration=None):
-        debug_log_path = "results/segment_adapt_debug.csv"
-        
-        for synapse in self.synapses_for_segment(segment):
-            cell, perm = self.synapse_data[synapse]
-            prev_perm = perm
-            if cell in prev_active_cells:
-                perm = min(1.0, perm + permanence_increment)
-            else:
-                perm = max(0.0, perm - permanence_decrement)
-            self.synapse_data[synapse] = (cell, perm)
-
-            # Only APPEND the log, don't create the file again
-            with open(debug_log_path, "a") as f:
-                f.write(f"{iteration},{segment},{synapse},{prev_perm:.4f},{perm:.4f},adapted\n")
+        """
+        Reinforce synapses to previously active cells and decay the rest.
+
+        Args:
+            segment (int): Segment ID.
+            prev_active_cells (set of int): Active cells at t-1.
+            permanence_increment (float): Increment for active synapses.
+            permanence_decrement (float): Decrement for inactive synapses.
+            iteration (int): Timestep, used for the debug log.
+        """
+        self.adapt_segments([segment], prev_active_cells, permanence_increment, permanence_decrement, iteration)
+
+
+    def adapt_segments(self, segments, prev_active_cells, permanence_increment, permanence_decrement, iteration=None):
+        """
+        Apply `adapt_segment` to many segments with a single vectorized update
+        over their permanences. Used for reinforcement (increment > 0) and for
+        punishing failed predictions (increment == 0).
+
+        Args:
+            segments (iterable of int): Segment IDs.
+            prev_active_cells (set of int): Active cells at t-1.
+            permanence_increment (float): Increment for active synapses.
+            permanence_decrement (float): Decrement for inactive synapses.
+            iteration (int): Timestep, used for the debug log.
+        """
+        synapses = self._synapses_for_segments(segments)
+        if synapses.size == 0:
+            return
+
+        prev_perms = self._permanences[synapses]
+        active = self._active_presynaptic_mask(synapses, prev_active_cells)
+        perms = np.where(
+            active,
+            np.minimum(1.0, prev_perms + permanence_increment),
+            np.maximum(0.0, prev_perms - permanence_decrement),
+        ).astype(np.float32)
+        self._permanences[synapses] = perms
+        self._permanence_sum += float(perms.sum(dtype=np.float64) - prev_perms.sum(dtype=np.float64))
+
+        if self.tracer.enabled("segment_adapt_debug"):
+            self.tracer.emit_rows("segment_adapt_debug", (
+                (iteration, segment, synapse, prev_perm, perm, "adapted")
+                for segment, synapse, prev_perm, perm in zip(
+                    self._synapse_segments[synapses].tolist(), synapses.tolist(),
+                    prev_perms.tolist(), perms.tolist()
+                )
+            ))
 
 
     def grow_synapses(self, segment, prev_winner_cells, initial_permanence, max_new_synapses):
@@ -175,16 +692,127 @@ class Connections:
             initial_permanence (float): Permanence value for new synapses.
             max_new_synapses (int): Max number of synapses to grow.
         """
-        # Find presynaptic cells that are not already connected by this segment
-        existing_presynaptic = {
-            self.synapse_data_for(synapse)[0] for synapse in self.synapses_for_segment(segment)
-        }
-        candidates = list(prev_winner_cells - existing_presynaptic)
+        self.grow_synapses_batch([segment], prev_winner_cells, initial_permanence, max_new_synapses)
+
+
+    def grow_synapses_batch(self, segments, prev_winner_cells, initial_permanence, max_new_synapses,
+                            max_synapses_per_segment=None):
+        """
+        Grow up to `max_new_synapses` synapses on each segment, connecting to a
+        random subset of the previous winner cells it is not yet connected to.
 
-        # Limit growth to max_new_synapses
-        np.random.shuffle(candidates)
-        for presynaptic_cell in candidates[:max_new_synapses]:
-            self.create_synapse(segment, presynaptic_cell, initial_permanence)
+        The random subsets for all segments are drawn from one matrix of
+        uniform keys: already-connected candidates get an infinite key and the
+        smallest keys per row are kept.
+
+        Args:
+            segments (list of int): Segment IDs.
+            prev_winner_cells (iterable of int): Winner cells from t-1 to connect to.
+            initial_permanence (float): Permanence value for new synapses.
+            max_new_synapses (int): Max number of synapses to grow per segment.
+            max_synapses_per_segment (int): If given, segments that would exceed
+                this size first lose their weakest synapses, and growth is capped.
+        """
+        candidates = np.unique(as_cell_array(prev_winner_cells))
+        segments = np.asarray(segments, dtype=np.int64)
+        if segments.size == 0 or candidates.size == 0 or max_new_synapses <= 0:
+            return
+
+        unknown = segments[(segments >= self._segment_id_counter) | (segments < 0)]
+        if unknown.size == 0:
+            unknown = segments[self._segment_cells[segments] < 0]
+        if unknown.size:
+            raise KeyError(int(unknown[0]))
+
+        num_new = min(max_new_synapses, candidates.size)
+        lengths = self._segment_synapses.lengths[segments].astype(np.int64)
+        allowed = np.full(segments.size, num_new)
+        if max_synapses_per_segment is not None:
+            # Make room on full segments by evicting their weakest synapses
+            overrun = lengths + num_new - max_synapses_per_segment
+            for row in np.flatnonzero(overrun > 0).tolist():
+                self.destroy_min_permanence_synapses(
+                    int(segments[row]), int(overrun[row]), exclude_cells=candidates)
+                lengths[row] = self._segment_synapses.lengths[segments[row]]
+            allowed = np.clip(max_synapses_per_segment - lengths, 0, num_new)
+
+        keys = self.rng.random((segments.size, candidates.size))
+
+        # Exclude presynaptic cells the segments are already connected to
+        existing = self._synapses_for_segments(segments)
+        if existing.size:
+            rows = np.repeat(np.arange(segments.size), lengths)
+            presynaptic = self._presynaptic_cells[existing]
+            columns = np.minimum(np.searchsorted(candidates, presynaptic), candidates.size - 1)
+            hit = candidates[columns] == presynaptic
+            keys[rows[hit], columns[hit]] = np.inf
+
+        # Limit growth to max_new_synapses, keeping each row's smallest keys first
+        if num_new < candidates.size:
+            chosen = np.argpartition(keys, num_new - 1, axis=1)[:, :num_new]
+        else:
+            chosen = np.broadcast_to(np.arange(candidates.size), keys.shape)
+        chosen_keys = np.take_along_axis(keys, chosen, axis=1)
+        order = np.argsort(chosen_keys, axis=1)
+        chosen = np.take_along_axis(chosen, order, axis=1)
+        chosen_keys = np.take_along_axis(chosen_keys, order, axis=1)
+        valid = np.isfinite(chosen_keys) & (np.arange(num_new) < allowed[:, None])
+
+        self._create_synapses(
+            np.repeat(segments, num_new)[valid.ravel()],
+            candidates[chosen][valid],
+            initial_permanence
+        )
+
+
+    def _synapses_for_segments(self, segments):
+        """
+        Concatenate the synapse IDs of several segments.
+
+        Args:
+            segments (iterable of int): Segment IDs.
+
+        Returns:
+            np.ndarray of int: Synapse IDs, grouped by segment in input order.
+        """
+        if not isinstance(segments, np.ndarray):
+            segments = np.fromiter(segments, dtype=np.int64)
+        return self._segment_synapses.gather(segments)
+
+
+    def _create_synapses(self, segments, presynaptic_cells, initial_permanence):
+        """
+        Bulk version of `create_synapse`: allocate all slots first, then fill
+        the storage arrays with one vectorized write.
+
+        Args:
+            segments (np.ndarray of int): Segment ID per new synapse.
+            presynaptic_cells (np.ndarray of int): Presynaptic cell per new synapse.
+            initial_permanence (float): Permanence value for new synapses.
+        """
+        count = len(segments)
+        if count == 0:
+            return
+
+        reused = [self._free_synapses.pop() for _ in range(min(count, len(self._free_synapses)))]
+        num_fresh = count - len(reused)
+        while self._num_synapse_slots + num_fresh > len(self._permanences):
+            self._grow_synapse_storage()
+        start = self._num_synapse_slots
+        self._num_synapse_slots += num_fresh
+        synapse_ids = np.concatenate([
+            np.asarray(reused, dtype=np.int64), np.arange(start, start + num_fresh)
+        ])
+
+        self._presynaptic_cells[synapse_ids] = presynaptic_cells
+        self._permanences[synapse_ids] = initial_permanence
+        self._synapse_segments[synapse_ids] = segments
+        self._num_synapses += count
+        self._permanence_sum += count * float(np.float32(initial_permanence))
+
+        self._synapse_positions[synapse_ids] = self._segment_synapses.append(segments, synapse_ids)
+        self._presynaptic_positions[synapse_ids] = self._presynaptic_synapses.append(
+            presynaptic_cells, synapse_ids)
 
 
     def destroy_synapse(self, synapse_id):
@@ -197,14 +825,40 @@ class Connections:
         if synapse_id not in self.synapse_data:
             return  # Already removed
 
-        presynaptic_cell, _ = self.synapse_data[synapse_id]
-        del self.synapse_data[synapse_id]
+        segment = int(self._synapse_segments[synapse_id])
+        presynaptic_cell = int(self._presynaptic_cells[synapse_id])
+        self._synapse_segments[synapse_id] = -1
+        self._free_synapses.append(synapse_id)
+        self._num_synapses -= 1
+        self._permanence_sum -= float(self._permanences[synapse_id])
 
-        # Also remove from its segment
-        for segment, synapses in self.segment_to_synapses.items():
-            if synapse_id in synapses:
-                synapses.remove(synapse_id)
-                break  # Synapse found and removed
+        # Also remove from its segment and from the presynaptic index
+        self._segment_synapses.remove(
+            segment, self._synapse_positions[synapse_id], self._synapse_positions)
+        self._presynaptic_synapses.remove(
+            presynaptic_cell, self._presynaptic_positions[synapse_id], self._presynaptic_positions)
+
+
+    def destroy_min_permanence_synapses(self, segment, count, exclude_cells=None):
+        """
+        Destroy the `count` weakest synapses on a segment.
+
+        Args:
+            segment (int): Segment ID.
+            count (int): Number of synapses to destroy.
+            exclude_cells (array-like of int): Presynaptic cells whose synapses
+                must be kept.
+        """
+        synapses = self._segment_synapses.get(segment).astype(np.int64)
+        if exclude_cells is not None and synapses.size:
+            synapses = synapses[~np.isin(self._presynaptic_cells[synapses], exclude_cells)]
+        if count <= 0 or synapses.size == 0:
+            return
+        if count < synapses.size:
+            synapses = synapses[np.argpartition(self._permanences[synapses], count - 1)[:count]]
+
+        for synapse_id in synapses.tolist():
+            self.destroy_synapse(synapse_id)
 
 
     def destroy_segment(self, segment_id):
@@ -214,21 +868,140 @@ class Connections:
         Args:
             segment_id (int): Segment ID to destroy.
         """
-        if segment_id not in self.segment_to_synapses:
+        if not self._segment_exists(segment_id):
             return  # Already removed
 
-        # Remove all synapses tied to this segment
-        for synapse_id in list(self.segment_to_synapses[segment_id]):
-            self.destroy_synapse(synapse_id)
+        # Remove all synapses tied to this segment. Its own list is emptied at
+        # once; only the presynaptic lists need a swap per synapse.
+        synapses = self.synapses_for_segment(segment_id)
+        self._segment_synapses.lengths[segment_id] = 0
+        self._synapse_segments[synapses] = -1
+        self._free_synapses.extend(synapses)
+        self._num_synapses -= len(synapses)
+        self._permanence_sum -= float(self._permanences[synapses].sum(dtype=np.float64))
+        for synapse_id, presynaptic_cell in zip(synapses, self._presynaptic_cells[synapses].tolist()):
+            self._presynaptic_synapses.remove(
+                presynaptic_cell, self._presynaptic_positions[synapse_id], self._presynaptic_positions)
 
         # Remove the segment from the owning cell
-        for cell, segments in self.cell_to_segments.items():
-            if segment_id in segments:
-                segments.remove(segment_id)
-                break
+        cell = int(self._segment_cells[segment_id])
+        _swap_remove(
+            self.cell_to_segments[cell],
+            self._segment_positions[segment_id], self._segment_positions
+        )
+
+        # Finally, free the segment ID
+        self._num_segments -= 1
+        self._segment_cells[segment_id] = -1
+        self._free_segments.append(segment_id)
 
-        # Finally, remove the segment entry itself
-        del self.segment_to_synapses[segment_id]
+
+    def garbage_collect(self, permanence_floor=0.0):
+        """
+        Remove synapses whose permanence is at or below `permanence_floor`,
+        remove segments left without synapses, then compact storage so that
+        segment and synapse IDs are dense again.
+
+        IDs change: callers holding segment or synapse IDs must translate them
+        with the returned maps.
+
+        Args:
+            permanence_floor (float): Synapses with permanence <= this are removed.
+
+        Returns:
+            (np.ndarray, np.ndarray): Old -> new segment ID map and old -> new
+            synapse ID map; removed IDs map to -1.
+        """
+        num_slots = self._num_synapse_slots
+        synapse_segments = self._synapse_segments[:num_slots]
+        keep_synapses = (synapse_segments >= 0) & (self._permanences[:num_slots] > permanence_floor)
+
+        num_segment_ids = self._segment_id_counter
+        has_synapses = np.bincount(
+            synapse_segments[keep_synapses], minlength=num_segment_ids
+        )[:num_segment_ids] > 0
+        keep_segments = (self._segment_cells[:num_segment_ids] >= 0) & has_synapses
+
+        segment_map = np.full(num_segment_ids, -1, dtype=np.int64)
+        segment_map[keep_segments] = np.arange(np.count_nonzero(keep_segments))
+        synapse_map = np.full(num_slots, -1, dtype=np.int64)
+        synapse_map[keep_synapses] = np.arange(np.count_nonzero(keep_synapses))
+
+        self._compact(np.flatnonzero(keep_synapses), np.flatnonzero(keep_segments), segment_map)
+        return segment_map, synapse_map
+
+
+    def _compact(self, old_synapses, old_segments, segment_map):
+        """
+        Rebuild all storage from the kept synapse and segment slots. New IDs
+        follow the old slot order, and every per-segment, per-cell and
+        per-presynaptic-cell list keeps its previous relative order.
+
+        Args:
+            old_synapses (np.ndarray of int): Sorted synapse slots to keep.
+            old_segments (np.ndarray of int): Sorted segment slots to keep.
+            segment_map (np.ndarray of int): Old -> new segment ID map.
+        """
+        presynaptic_cells = self._presynaptic_cells[old_synapses]
+        synapse_segments = segment_map[self._synapse_segments[old_synapses]].astype(np.int32)
+        segment_cells = self._segment_cells[old_segments]
+
+        self._segment_synapses, synapse_positions = _SlotLists.grouped(
+            synapse_segments, self._synapse_positions[old_synapses], len(old_segments))
+        self._presynaptic_synapses, presynaptic_positions = _SlotLists.grouped(
+            presynaptic_cells, self._presynaptic_positions[old_synapses],
+            len(self._presynaptic_synapses.starts))
+        segment_positions, cell_to_segments = _group_in_order(
+            segment_cells, self._segment_positions[old_segments])
+
+        self._presynaptic_cells = presynaptic_cells
+        self._permanences = self._permanences[old_synapses]
+        self._synapse_segments = synapse_segments
+        self._synapse_positions = synapse_positions
+        self._presynaptic_positions = presynaptic_positions
+        self._free_synapses = []
+        self._num_synapse_slots = self._num_synapses = len(old_synapses)
+        # Re-derive the running sum exactly, discarding accumulated rounding drift
+        self._permanence_sum = float(self._permanences.sum(dtype=np.float64))
+
+        self._segment_cells = segment_cells
+        self._segment_positions = segment_positions
+        self._segment_last_used = self._segment_last_used[old_segments]
+        self._free_segments = []
+        self._segment_id_counter = self._num_segments = len(old_segments)
+
+        self.cell_to_segments = cell_to_segments
+
+
+    def stats(self):
+        """
+        Model health metrics, read from counters maintained incrementally, so
+        the cost does not depend on model size.
+
+        Returns:
+            dict: num_segments, num_synapses, permanence_sum and avg_permanence.
+        """
+        return {
+            "num_segments": self._num_segments,
+            "num_synapses": self._num_synapses,
+            "permanence_sum": self._permanence_sum,
+            "avg_permanence": self._permanence_sum / self._num_synapses if self._num_synapses else 0.0,
+        }
+
+
+    def storage_nbytes(self):
+        """
+        Returns the memory held by the synapse and segment arrays and the
+        segment and presynaptic indexes, including unused capacity.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(array.nbytes for array in (
+            self._presynaptic_cells, self._permanences, self._synapse_segments,
+            self._synapse_positions, self._presynaptic_positions,
+            self._segment_cells, self._segment_positions, self._segment_last_used,
+        )) + self._segment_synapses.nbytes + self._presynaptic_synapses.nbytes
 
 
     def segments(self):
@@ -238,7 +1011,7 @@ class Connections:
         Returns:
             list of int: Segment IDs.
         """
-        return list(self.segment_to_synapses.keys())
+        return np.flatnonzero(self._segment_cells[:self._segment_id_counter] >= 0).tolist()
 
 
     def is_cell_predictive(self, cell, active_segments):
@@ -291,10 +1064,45 @@ class Connections:
         Returns:
             int: Cell index.
         """
-        for cell, segments in self.cell_to_segments.items():
-            if segment_id in segments:
-                return cell
-        raise ValueError(f"Segment ID {segment_id} not found in any cell.")
+        if not self._segment_exists(segment_id):
+            raise ValueError(f"Segment ID {segment_id} not found in any cell.")
+        return int(self._segment_cells[segment_id])
+
+
+    def _segment_exists(self, segment_id):
+        return (
+            isinstance(segment_id, (int, np.integer))
+            and 0 <= segment_id < self._segment_id_counter
+            and self._segment_cells[segment_id] >= 0
+        )
+
+
+    def cells_for_segments(self, segments):
+        """
+        Returns the owning cell of each given segment.
+
+        Args:
+            segments (array-like of int): Existing segment IDs.
+
+        Returns:
+            np.ndarray of int: Cell index per segment.
+        """
+        return self._segment_cells[np.asarray(segments, dtype=np.int64)]
+
+
+    def segment_for_synapse(self, synapse_id):
+        """
+        Returns the segment that owns the given synapse.
+
+        Args:
+            synapse_id (int): Synapse ID.
+
+        Returns:
+            int: Segment ID.
+        """
+        if synapse_id not in self.synapse_data:
+            raise KeyError(synapse_id)
+        return int(self._synapse_segments[synapse_id])
 
 
     def column_for_cell(self, cell, cells_per_column):
@@ -1,6 +1,7 @@
 import math
 import numpy as np
 from datetime import datetime
+from htm_py.sdr import SDR
 
 
 class DateEncoder:
@@ -12,23 +13,96 @@ class DateEncoder:
         self.strptime_str = strptime_str
         self.output_width = timeOfDay[0]
 
-    def encode(self, timestamp):
-        n, w = self.timeOfDay
-        w = int(round(w))
+        # There are only n distinct encodings: row b holds the sorted active
+        # bits of time-of-day bucket b.
+        n, w = timeOfDay
+        w = min(int(round(w)), n)
         half_w = w // 2
+        self._bucket_bits = np.sort((np.arange(n)[:, None] - half_w + np.arange(w)) % n, axis=1)
+        self._bucket_bits.flags.writeable = False
 
+    def _bucket(self, timestamp):
         # 🩹 Fix: auto-parse string timestamps
         if isinstance(timestamp, str):
             timestamp = datetime.strptime(timestamp, self.strptime_str)
 
-        time_of_day = timestamp.hour + timestamp.minute / 60.0
-        bucket = int(time_of_day / 24.0 * n)
+        if isinstance(timestamp, np.datetime64):
+            minutes_of_day = int(
+                (timestamp.astype("datetime64[m]") - timestamp.astype("datetime64[D]")).astype(np.int64)
+            )
+            hours, minutes = divmod(minutes_of_day, 60)
+        else:
+            hours, minutes = timestamp.hour, timestamp.minute
+        time_of_day = hours + minutes / 60.0
+        return int(time_of_day / 24.0 * self.timeOfDay[0])
 
-        sdr = [0] * n
-        for i in range(w):
-            index = (bucket - half_w + i) % n
-            sdr[index] = 1
+    def encode(self, timestamp):
+        return SDR(self.timeOfDay[0], sparse=self._bucket_bits[self._bucket(timestamp)])
 
-        return np.array(sdr, dtype=np.int64)
+    def encode_into(self, timestamp, out):
+        """
+        Write the encoding of `timestamp` into a preallocated buffer.
 
+        Args:
+            timestamp (str, datetime or np.datetime64): Timestamp to encode.
+            out (np.ndarray): Dense buffer of length n, overwritten.
+        """
+        out.fill(0)
+        out[self._bucket_bits[self._bucket(timestamp)]] = 1
 
+    def time_of_day_buckets(self, timestamps):
+        """
+        Args:
+            timestamps (np.ndarray of datetime64, pandas datetime Series or
+                DatetimeIndex, or array-like of str/datetime): Timestamps.
+
+        Returns:
+            np.ndarray of int: Time-of-day bucket of every timestamp.
+        """
+        if hasattr(timestamps, "dt"):
+            timestamps = timestamps.dt
+        if hasattr(timestamps, "hour"):
+            # pandas keeps timezone-aware wall-clock hours this way
+            hours = np.asarray(timestamps.hour, dtype=np.int64)
+            minutes = np.asarray(timestamps.minute, dtype=np.int64)
+        elif len(timestamps) and isinstance(timestamps[0], datetime):
+            # datetime objects: read wall-clock time like `encode`, since
+            # datetime64 would convert timezone-aware values to UTC
+            hours = np.array([t.hour for t in timestamps], dtype=np.int64)
+            minutes = np.array([t.minute for t in timestamps], dtype=np.int64)
+        else:
+            timestamps = np.asarray(timestamps)
+            if not np.issubdtype(timestamps.dtype, np.datetime64):
+                try:
+                    timestamps = timestamps.astype("datetime64[m]")
+                except ValueError:
+                    timestamps = np.array([
+                        datetime.strptime(t, self.strptime_str) if isinstance(t, str) else t
+                        for t in timestamps
+                    ], dtype="datetime64[m]")
+            minutes_of_day = (
+                timestamps.astype("datetime64[m]") - timestamps.astype("datetime64[D]")
+            ).astype(np.int64)
+            hours, minutes = np.divmod(minutes_of_day, 60)
+
+        time_of_day = hours + minutes / 60.0
+        return (time_of_day / 24.0 * self.timeOfDay[0]).astype(np.int64)
+
+    def encode_batch(self, timestamps, sparse=False):
+        """
+        Encode many timestamps at once without per-row parsing.
+
+        Args:
+            timestamps: Anything `time_of_day_buckets` accepts.
+            sparse (bool): Return active bit indices instead of dense rows.
+
+        Returns:
+            np.ndarray: (N x n) dense uint8 encodings, or with `sparse=True`
+                an (N x w) matrix of the active bit indices of each row.
+        """
+        active = self._bucket_bits[self.time_of_day_buckets(timestamps)]
+        if sparse:
+            return active
+        encodings = np.zeros((len(active), self.timeOfDay[0]), dtype=np.uint8)
+        np.put_along_axis(encodings, active, 1, axis=1)
+        return encodings
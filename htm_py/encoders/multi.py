@@ -1,4 +1,5 @@
 import numpy as np
+from htm_py.sdr import SDR
 
 class MultiEncoder:
     def __init__(self, encoders):
@@ -9,19 +10,68 @@ class MultiEncoder:
         self.encoders = encoders
         self.output_width = sum(encoder.output_width for encoder in encoders.values())
 
-    def encode(self, input_data):
+        # Fixed position of every feature in the concatenated output
+        self.slices = {}
+        start = 0
+        for feature, encoder in encoders.items():
+            self.slices[feature] = slice(start, start + encoder.output_width)
+            start += encoder.output_width
+
+    def encode(self, input_data, out=None):
         """
         Args:
             input_data (dict): Mapping from feature name to value.
+            out (SDR): Optional SDR of size `output_width` to overwrite, so
+                repeated calls reuse one buffer.
 
         Returns:
-            np.array: Concatenated SDR encoding across all features.
+            SDR: Concatenated encoding across all features (`out` when given).
         """
-        encoded_pieces = []
+        if out is None:
+            out = SDR(self.output_width)
+        dense = out.dense
         for feature, encoder in self.encoders.items():
             value = input_data.get(feature)
             if value is None:
                 raise ValueError(f"Missing input value for feature '{feature}'")
-            encoded_pieces.append(encoder.encode(value))
+            piece = dense[self.slices[feature]]
+            if hasattr(encoder, "encode_into"):
+                encoder.encode_into(value, piece)
+            else:
+                piece[:] = encoder.encode(value)
+        out.dense_modified()
+        return out
+
+    def encode_batch(self, columns):
+        """
+        Encode many records given column-wise, using each encoder's
+        `encode_batch` when it has one.
+
+        Args:
+            columns (dict): Mapping from feature name to a sequence of values,
+                all of the same length.
+
+        Returns:
+            np.ndarray: (N x output_width) dense uint8 encodings.
+        """
+        num_rows = None
+        encodings = None
+        for feature, encoder in self.encoders.items():
+            values = columns.get(feature)
+            if values is None or any(value is None for value in values):
+                raise ValueError(f"Missing input value for feature '{feature}'")
+            if encodings is None:
+                num_rows = len(values)
+                encodings = np.zeros((num_rows, self.output_width), dtype=np.uint8)
+            elif len(values) != num_rows:
+                raise ValueError(f"Column '{feature}' has {len(values)} values, expected {num_rows}")
 
-        return np.concatenate(encoded_pieces)
+            block = encodings[:, self.slices[feature]]
+            if hasattr(encoder, "encode_batch"):
+                block[:] = encoder.encode_batch(values)
+            else:
+                for row, value in zip(block, values):
+                    row[:] = encoder.encode(value)
+        if encodings is None:
+            encodings = np.zeros((0, self.output_width), dtype=np.uint8)
+        return encodings
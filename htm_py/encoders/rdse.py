@@ -1,7 +1,10 @@
+import math
+from collections import OrderedDict
 import numpy as np
+from htm_py.sdr import SDR
 
 class RDSE:
-    def __init__(self, min_val, max_val, n=None, w=21, resolution=None):
+    def __init__(self, min_val, max_val, n=None, w=21, resolution=None, cache_size=1024):
         self.min_val = min_val
         self.max_val = max_val
         self.w = w
@@ -20,18 +23,204 @@ class RDSE:
             assert self.resolution > 0, "Resolution must be positive"
 
         self.output_width = self.n  # Ensure compatibility with MultiEncoder
+        self._init_cache(cache_size)
 
-    def encode(self, value):
-        if not (self.min_val <= value <= self.max_val):
+    def _init_cache(self, cache_size):
+        # The encoding depends only on the bucket: bucket -> sorted active
+        # bits, least recently used evicted first.
+        self.cache_size = cache_size
+        self._bucket_cache = OrderedDict()
+        half_width = self.w // 2
+        self._offsets = np.arange(-half_width, half_width + 1)
+
+    def _check_range(self, values):
+        out_of_range = ~((self.min_val <= values) & (values <= self.max_val))
+        if out_of_range.any():
+            value = values[np.argmax(out_of_range)]
             raise ValueError(f"Value {value} outside range [{self.min_val}, {self.max_val}]")
 
-        center_bucket = int((value - self.min_val) / self.resolution)
-        center_bucket = min(center_bucket, self.num_buckets - 1)
+    def _buckets(self, values):
+        """
+        Args:
+            values (np.ndarray of float): Values inside the encoder's range.
 
-        sdr = np.zeros(self.n, dtype=np.int64)
-        half_width = self.w // 2
-        for i in range(-half_width, half_width + 1):
-            idx = (center_bucket + i) % self.n
-            sdr[idx] = 1
+        Returns:
+            np.ndarray of int: Center bucket of every value.
+        """
+        buckets = ((values - self.min_val) / self.resolution).astype(np.int64)
+        return np.minimum(buckets, self.num_buckets - 1, out=buckets)
+
+    def _bucket(self, value):
+        """Scalar `_check_range` and `_buckets` for a single value."""
+        if not self.min_val <= value <= self.max_val:
+            raise ValueError(f"Value {value} outside range [{self.min_val}, {self.max_val}]")
+        return min(int((value - self.min_val) / self.resolution), self.num_buckets - 1)
+
+    def _bucket_bits(self, buckets):
+        """
+        Args:
+            buckets (np.ndarray of int): Buckets.
+
+        Returns:
+            np.ndarray of int: (len(buckets) x w) active bits of every bucket.
+        """
+        return (buckets[:, None] + self._offsets) % self.n
+
+    def _active_bits(self, bucket):
+        """
+        Args:
+            bucket (int): Bucket.
+
+        Returns:
+            np.ndarray of int: Sorted, read-only active bits of the bucket.
+        """
+        active = self._bucket_cache.get(bucket)
+        if active is None:
+            active = np.unique(self._bucket_bits(np.array([bucket]))[0])
+            active.flags.writeable = False
+            self._bucket_cache[bucket] = active
+            if len(self._bucket_cache) > self.cache_size:
+                self._bucket_cache.popitem(last=False)
+        else:
+            self._bucket_cache.move_to_end(bucket)
+        return active
+
+    def encode(self, value):
+        return SDR(self.n, sparse=self._active_bits(self._bucket(value)))
+
+    def encode_into(self, value, out):
+        """
+        Write the encoding of `value` into a preallocated buffer.
+
+        Args:
+            value (float): Value to encode.
+            out (np.ndarray): Dense buffer of length n, overwritten.
+        """
+        out.fill(0)
+        out[self._active_bits(self._bucket(value))] = 1
+
+    def encode_batch(self, values, sparse=False):
+        """
+        Encode many values at once.
+
+        Args:
+            values (array-like of float): Values to encode.
+            sparse (bool): Return active bit indices instead of dense rows.
+
+        Returns:
+            np.ndarray: (len(values) x n) dense uint8 encodings, or with
+                `sparse=True` a (len(values) x w) matrix of the active bit
+                indices of each row, ascending.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self._check_range(values)
+        active = np.sort(self._bucket_bits(self._buckets(values)), axis=1)
+        if sparse:
+            return active
+        encodings = np.zeros((len(values), self.n), dtype=np.uint8)
+        np.put_along_axis(encodings, active, 1, axis=1)
+        return encodings
+
+
+class RandomDistributedScalarEncoder(RDSE):
+    """
+    Randomized distributed scalar encoder with a fixed width.
+
+    Values are split into buckets of `resolution` starting at `min_val`, with
+    no upper or lower bound. Bucket b activates the bits hash(seed, b + i) % n
+    for i in [0, w); when a hash lands on a bit the bucket already uses, it
+    is rehashed until it finds a new one, so every bucket has exactly w
+    active bits. Neighboring buckets share all but one of their hash inputs
+    and overlap in about w - 1 bits, while distant buckets overlap only by
+    chance.
+
+    Args:
+        n (int): Number of bits, independent of the value range.
+        w (int): Number of active bits per value.
+        resolution (float): Width of one bucket. Defaults to the bucket width
+            a linear encoder of the same n would use over [min_val, max_val].
+        min_val (float): Origin of bucket 0.
+        max_val (float): Only used to derive the default resolution.
+        seed (int): Seed of the bucket-to-bit hash.
+        cache_size (int): Maximum number of cached bucket encodings.
+    """
+
+    def __init__(self, n, w=21, resolution=None, min_val=0.0, max_val=None, seed=42, cache_size=1024):
+        if resolution is None:
+            if max_val is None:
+                raise ValueError("Either resolution or max_val must be given")
+            resolution = (max_val - min_val) / (n - w)
+        if resolution <= 0:
+            raise ValueError("Resolution must be positive")
+        if not 0 < w <= n:
+            raise ValueError(f"w must lie in [1, n], got w={w} and n={n}")
+
+        self.min_val = min_val
+        self.max_val = max_val
+        self.n = n
+        self.w = w
+        self.resolution = resolution
+        self.seed = seed
+        self.output_width = n
+        self._init_cache(cache_size)
+        self._offsets = np.arange(w, dtype=np.uint64)
+        self._seed_key = np.uint64((seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+
+    def _check_range(self, values):
+        if np.isnan(values).any():
+            raise ValueError("Cannot encode NaN")
+
+    def _buckets(self, values):
+        # Clipped so that extreme values still map to valid int64 buckets
+        buckets = np.floor((values - self.min_val) / self.resolution)
+        return np.clip(buckets, -2 ** 62, 2 ** 62).astype(np.int64)
+
+    def _bucket(self, value):
+        if math.isnan(value):
+            raise ValueError("Cannot encode NaN")
+        bucket = math.floor(min(max((value - self.min_val) / self.resolution, -2.0 ** 62), 2.0 ** 62))
+        return int(bucket)
+
+    def _hash(self, keys, attempt):
+        # splitmix64 finalizer over the key mixed with the seed; later
+        # attempts add another odd constant to rehash after a collision
+        with np.errstate(over="ignore"):
+            x = keys + self._seed_key + np.uint64(attempt) * np.uint64(0xD1B54A32D192ED03)
+            x ^= x >> np.uint64(30)
+            x *= np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(27)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+        return (x % np.uint64(self.n)).astype(np.int64)
+
+    def _bucket_bits(self, buckets):
+        unique, inverse = np.unique(buckets, return_inverse=True)
+        keys = unique.astype(np.uint64)[:, None] + self._offsets
+        bits = np.empty(keys.shape, dtype=np.int64)
+        # Bit i of every bucket, rehashing the rows whose hash repeats one
+        # of their first i bits
+        for i in range(self.w):
+            rows = np.arange(len(unique))
+            attempt = 0
+            while rows.size:
+                candidates = self._hash(keys[rows, i], attempt)
+                taken = (bits[rows, :i] == candidates[:, None]).any(axis=1)
+                bits[rows[~taken], i] = candidates[~taken]
+                rows = rows[taken]
+                attempt += 1
+        return bits[inverse.ravel()]
+
+    def encode_batch(self, values, sparse=False):
+        """
+        Encode many values at once.
+
+        Args:
+            values (array-like of float): Values to encode.
+            sparse (bool): Return active bit indices instead of dense rows.
 
-        return sdr
+        Returns:
+            np.ndarray: (len(values) x n) dense uint8 encodings, or with
+                `sparse=True` a (len(values) x w) matrix of the active bits
+                of each row, ascending.
+        """
+        return super().encode_batch(values, sparse=sparse)
@@ -0,0 +1,221 @@
+import os
+import queue
+import zlib
+import traceback
+import multiprocessing
+from collections import defaultdict
+import numpy as np
+from htm_py.htm_model import HTMModel
+from htm_py.tracing import stream_config
+
+
+def load_config(config):
+    """
+    Args:
+        config (dict, str or os.PathLike): Model config or path to a YAML file.
+
+    Returns:
+        dict: Model config.
+    """
+    if isinstance(config, (str, os.PathLike)):
+        import yaml
+        with open(config) as f:
+            return yaml.safe_load(f)
+    return config
+
+
+def _worker_loop(config, tasks, results):
+    """
+    Worker process: owns the models of every stream routed to it and runs
+    their batches in arrival order.
+    """
+    models = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            # atexit hooks do not run in worker processes
+            for model in models.values():
+                model.tracer.close()
+            return
+        stream, seq, records, learn = task
+        try:
+            model = models.get(stream)
+            if model is None:
+                # HTMModel fills in derived settings, so each stream gets its own copy
+                model = models[stream] = HTMModel(stream_config(config, stream))
+            anomaly_scores, prediction_counts = model.run(records, learn=learn)
+            results.put((stream, seq, anomaly_scores, prediction_counts, None))
+        except Exception:
+            results.put((stream, seq, None, None, traceback.format_exc()))
+
+
+class StreamExecutor:
+    """
+    Runs many independent named streams, one `HTMModel` per stream, across a
+    pool of worker processes.
+
+    Each stream is pinned to one worker by a stable hash of its name, so its
+    model lives in exactly one process and its batches run in order. Records
+    travel to the workers in batches of `batch_size` to amortize IPC.
+
+    Args:
+        config (dict, str or os.PathLike): Model config, or path to a YAML
+            file, used to build every stream's model.
+        num_workers (int): Worker processes; defaults to the CPU count.
+        batch_size (int): Records per batch sent to a worker.
+        mp_context (str): multiprocessing start method, e.g. "spawn".
+    """
+
+    def __init__(self, config, num_workers=None, batch_size=256, mp_context=None):
+        self.config = load_config(config)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+        context = multiprocessing.get_context(mp_context)
+        self._tasks = [context.Queue() for _ in range(self.num_workers)]
+        self._results = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_worker_loop, args=(self.config, tasks, self._results),
+                name=f"StreamExecutor-{i}", daemon=True,
+            )
+            for i, tasks in enumerate(self._tasks)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self._buffers = {}
+        self._next_seq = defaultdict(int)
+        self._num_outstanding = 0
+        self._closed = False
+
+    def worker_for(self, stream):
+        """
+        Args:
+            stream (str): Stream name.
+
+        Returns:
+            int: Index of the worker that owns the stream.
+        """
+        return zlib.crc32(str(stream).encode()) % self.num_workers
+
+    def submit(self, stream, records, learn=True):
+        """
+        Queue records for a stream. Full batches are sent right away; call
+        `flush` (or `results`) to send the remainder.
+
+        Args:
+            stream (str): Stream name.
+            records (iterable of dict): Input records in time order.
+            learn (bool): Whether the stream's model should learn.
+        """
+        buffered_learn, buffer = self._buffers.setdefault(stream, (learn, []))
+        if buffered_learn != learn:
+            # A batch runs with a single learn flag; send what is pending so
+            # the stream's records still reach its model in time order
+            self._send_pending(stream)
+            self._buffers[stream] = (learn, buffer)
+        buffer.extend(records)
+        while len(buffer) >= self.batch_size:
+            self._send(stream, buffer[:self.batch_size], learn)
+            del buffer[:self.batch_size]
+
+    def flush(self):
+        """Send every partially filled batch."""
+        for stream in self._buffers:
+            self._send_pending(stream)
+
+    def results(self):
+        """
+        Flush, then wait for every batch sent so far.
+
+        Yields:
+            (str, np.ndarray, np.ndarray): Stream name, anomaly scores and
+                prediction counts of one batch. Batches of the same stream
+                come back in submission order.
+
+        Raises:
+            RuntimeError: If a worker failed on a batch.
+        """
+        self.flush()
+        while self._num_outstanding:
+            stream, _, anomaly_scores, prediction_counts, error = self._results.get()
+            self._num_outstanding -= 1
+            if error is not None:
+                raise RuntimeError(f"Stream {stream!r} failed in its worker:\n{error}")
+            yield stream, anomaly_scores, prediction_counts
+
+    def run(self, streams, learn=True):
+        """
+        Run whole streams and gather their results.
+
+        Args:
+            streams (dict): Stream name -> pandas DataFrame, NumPy record
+                array or list of input dicts.
+            learn (bool): Whether the models should learn.
+
+        Returns:
+            dict: Stream name -> (anomaly scores, prediction counts) arrays.
+        """
+        for stream, data in streams.items():
+            if isinstance(data, (list, tuple)):
+                self.submit(stream, data, learn)
+                continue
+            self._send_pending(stream)
+            for start in range(0, len(data), self.batch_size):
+                self._send(stream, data[start:start + self.batch_size], learn)
+
+        batches = defaultdict(list)
+        for stream, anomaly_scores, prediction_counts in self.results():
+            batches[stream].append((anomaly_scores, prediction_counts))
+        return {
+            stream: (
+                np.concatenate([scores for scores, _ in batches[stream]] or [np.zeros(0)]),
+                np.concatenate([counts for _, counts in batches[stream]] or [np.zeros(0)]),
+            )
+            for stream in streams
+        }
+
+    def close(self):
+        """
+        Stop the workers once they have finished their queued batches.
+        Results not yet read through `results` are discarded.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            # A worker cannot exit while its unread results are still being
+            # written to the result pipe, so keep draining it
+            while worker.is_alive():
+                self._discard_results()
+                worker.join(timeout=0.05)
+        self._discard_results()
+        self._num_outstanding = 0
+
+    def _discard_results(self):
+        try:
+            while True:
+                self._results.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _send_pending(self, stream):
+        learn, buffer = self._buffers.get(stream, (None, []))
+        if buffer:
+            self._send(stream, list(buffer), learn)
+            buffer.clear()
+
+    def _send(self, stream, records, learn):
+        seq = self._next_seq[stream]
+        self._next_seq[stream] += 1
+        self._tasks[self.worker_for(stream)].put((stream, seq, records, learn))
+        self._num_outstanding += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
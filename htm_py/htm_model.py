@@ -1,27 +1,46 @@
-import os
+from itertools import islice
+import numpy as np
 from htm_py.encoders.multi import MultiEncoder
 from htm_py.encoders.date import DateEncoder
-from htm_py.encoders.rdse import RDSE
+from htm_py.encoders.rdse import RDSE, RandomDistributedScalarEncoder
+from htm_py.sdr import SDR
 from htm_py.spatial_pooler import SpatialPooler
 from htm_py.temporal_memory import TemporalMemory
+from htm_py.tracing import tracer_from_config
 
 class HTMModel:
-    def __init__(self, config, encoder=None):
+    def __init__(self, config, encoder=None, tracer=None):
         enc_cfg = config["encoder"]
 
+        # === Tracing Setup (disabled unless configured) ===
+        self.tracer = tracer if tracer is not None else tracer_from_config(config.get("trace"))
+
         # === Encoder Setup ===
         if isinstance(encoder, MultiEncoder):
             self.encoder = encoder
         else:
             encoders = {}
             for feature in enc_cfg.get("rdse_features", []):
+                kind = feature.get("encoder", "rdse")
+                if kind == "hashed":
+                    # Hashed encoder: fixed n, any value range
+                    encoders[feature["name"]] = RandomDistributedScalarEncoder(
+                        n=feature["n"],
+                        w=feature.get("w", 21),
+                        resolution=feature.get("resolution"),
+                        min_val=feature.get("min_val", 0.0),
+                        max_val=feature.get("max_val"),
+                        seed=feature.get("seed", 42),
+                    )
+                    continue
+                if kind != "rdse":
+                    raise ValueError(f"Unknown encoder {kind!r} for feature {feature['name']!r}")
                 encoders[feature["name"]] = RDSE(
                     min_val=feature["min_val"],
                     max_val=feature["max_val"],
                     n=feature.get("n"),
                     w=feature.get("w", 21),
                     resolution=feature.get("resolution"),
-                    # seed=feature.get("seed", None)
                 )
             if "timeOfDay" in enc_cfg:
                 time_cfg = enc_cfg["timeOfDay"]
@@ -30,6 +49,9 @@ class HTMModel:
                 )
             self.encoder = MultiEncoder(encoders)
 
+        # Every step encodes into this one SDR
+        self._encoding = SDR(self.encoder.output_width)
+
         # === Spatial Pooler Setup ===
         self.use_sp = config.get("use_sp", False)
         sp_cfg = config.get("sp", {})
@@ -43,8 +65,10 @@ class HTMModel:
                 inputDimensions=[sp_cfg["inputWidth"]],
                 columnDimensions=[sp_cfg["columnCount"]],
                 potentialPct=sp_cfg.get("potentialPct", 0.8),
-                # globalInhibition=sp_cfg.get("globalInhibition", True),
-                # numActiveColumnsPerInhArea=sp_cfg.get("numActiveColumnsPerInhArea", 40),
+                globalInhibition=sp_cfg.get("globalInhibition", True),
+                numActiveColumnsPerInhArea=sp_cfg.get("numActiveColumnsPerInhArea", 40),
+                localAreaDensity=sp_cfg.get("localAreaDensity", -1.0),
+                inhibitionRadius=sp_cfg.get("inhibitionRadius"),
                 synPermActiveInc=sp_cfg.get("synPermActiveInc", 0.003),
                 synPermInactiveDec=sp_cfg.get("synPermInactiveDec", 0.0005),
                 synPermConnected=sp_cfg.get("synPermConnected", 0.2),
@@ -55,7 +79,7 @@ class HTMModel:
             self.sp = None
 
         # === Temporal Memory Setup ===
-        self.tm = TemporalMemory(**config["tm"])
+        self.tm = TemporalMemory(**config["tm"], tracer=self.tracer)
 
     def compute(self, input_data, learn=True):
         """
@@ -68,31 +92,98 @@ class HTMModel:
         Returns:
             (float, float): (Anomaly Score, Prediction Count)
         """
-        encoded = self.encoder.encode(input_data)
+        encoded = self.encoder.encode(input_data, out=self._encoding)
+        return self._compute_encoded(encoded, learn)
 
-        active_columns = (
-            self.sp.compute(encoded, learn=learn)
-            if self.use_sp else 
-            [i for i, bit in enumerate(encoded) if bit == 1]
-        )
+    def _compute_encoded(self, encoded, learn, active_columns=None):
+        """
+        Run the SP (unless `active_columns` are already known) and the TM on
+        one encoded input.
+        """
+        if active_columns is None:
+            active_columns = self.sp.compute(encoded, learn=learn) if self.use_sp else encoded
 
-        if self.use_sp:
-            log_path = "results/sp_active_columns_trace.csv"
-            if not os.path.exists(log_path):
-                with open(log_path, "w") as f:
-                    f.write("timestep,num_active_columns\n")
-            with open(log_path, "a") as f:
-                f.write(f"{self.tm.iteration},{len(active_columns)}\n")
+        if self.use_sp and self.tracer.enabled("sp_active_columns_trace"):
+            self.tracer.emit("sp_active_columns_trace", (self.tm.iteration, len(active_columns)))
 
         anomaly_score, prediction_count = self.tm.compute(active_columns, learn=learn)
         return anomaly_score, prediction_count
 
+    def stream(self, data, learn=True, batch_size=1024):
+        """
+        Compute every record of `data` in order, yielding results as they are
+        produced. Records are encoded `batch_size` at a time ahead of the
+        per-step SP/TM loop; without learning the SP also runs per batch.
 
-# sp_diag_log = "results/sp_active_columns_trace.csv"
-# if not os.path.exists(sp_diag_log):
-#     with open(sp_diag_log, "w") as f:
-#         f.write("timestep,num_active_columns\n")
+        Args:
+            data: pandas DataFrame or NumPy record array with one column per
+                encoder feature, or an iterable of input dicts.
+            learn (bool): Whether the model should learn.
+            batch_size (int): Records encoded together.
 
-# with open(sp_diag_log, "a") as f:
-#     f.write(f"{self.tm.iteration},{len(active_columns)}\n")
+        Yields:
+            (float, float): (Anomaly Score, Prediction Count) per record.
+        """
+        for columns in self._column_batches(data, batch_size):
+            encodings = self.encoder.encode_batch(columns)
+            batch_columns = (
+                self.sp.compute_batch(encodings, learn=False)
+                if self.use_sp and not learn else [None] * len(encodings)
+            )
+            for row, active_columns in zip(encodings, batch_columns):
+                self._encoding.dense = row
+                yield self._compute_encoded(self._encoding, learn, active_columns)
 
+    def run(self, data, learn=True, batch_size=1024, out=None):
+        """
+        Compute every record of `data` and collect the results in arrays.
+
+        Args:
+            data: Anything `stream` accepts.
+            learn (bool): Whether the model should learn.
+            batch_size (int): Records encoded together.
+            out (tuple of np.ndarray): Optional preallocated (anomaly scores,
+                prediction counts) arrays with room for every record.
+
+        Returns:
+            (np.ndarray, np.ndarray): Anomaly scores and prediction counts,
+                views of `out` when given.
+        """
+        if out is None:
+            results = np.array(list(self.stream(data, learn, batch_size)), dtype=np.float64).reshape(-1, 2)
+            return results[:, 0], results[:, 1]
+
+        anomaly_scores, prediction_counts = out
+        count = 0
+        for count, (anomaly_score, prediction_count) in enumerate(self.stream(data, learn, batch_size), 1):
+            if count > len(anomaly_scores) or count > len(prediction_counts):
+                raise ValueError(f"Output arrays hold fewer than {count} results")
+            anomaly_scores[count - 1] = anomaly_score
+            prediction_counts[count - 1] = prediction_count
+        return anomaly_scores[:count], prediction_counts[:count]
+
+    def _column_batches(self, data, batch_size):
+        """
+        Yields:
+            dict: Feature name -> values of up to `batch_size` records.
+        """
+        features = list(self.encoder.encoders)
+        if hasattr(data, "columns") or getattr(getattr(data, "dtype", None), "names", None):
+            # Columnar input: slice each feature column directly
+            columns = {}
+            for feature in features:
+                column = data[feature]
+                # Datetime Series keep `.dt`, which reads timezone-aware
+                # wall-clock time; np.asarray would convert it to UTC
+                columns[feature] = column.iloc if hasattr(column, "dt") else np.asarray(column)
+            num_rows = len(data)
+            for start in range(0, num_rows, batch_size):
+                yield {feature: values[start:start + batch_size] for feature, values in columns.items()}
+            return
+
+        records = iter(data)
+        while True:
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                return
+            yield {feature: [record.get(feature) for record in chunk] for feature in features}
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Number of set bits of every byte value, to count bits of a packed bitset
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class SDR:
+    """
+    Sparse distributed representation of `size` bits, shared by the encoders,
+    SpatialPooler and TemporalMemory.
+
+    An SDR is set through one view, either `dense` or `sparse`. The other
+    views are derived on first access and cached until the next assignment:
+
+    - `dense`: np.ndarray of uint8 with one 0/1 entry per bit.
+    - `sparse`: np.ndarray of int with the indices of the active bits.
+    - `bitset`: np.ndarray of uint8, the dense bits packed 8 per byte.
+
+    The dense buffer is allocated once per SDR and overwritten in place by
+    later assignments. Producers may also write into `dense` directly and
+    then call `dense_modified()`. `np.asarray(sdr)` returns the dense view,
+    so an SDR can be passed wherever a dense array was accepted before.
+
+    Args:
+        size (int): Number of bits.
+        dense (array-like): Initial dense bits, optional.
+        sparse (array-like of int): Initial active bit indices, optional.
+    """
+
+    __slots__ = ("size", "_dense", "_dense_valid", "_sparse", "_bitset")
+
+    def __init__(self, size, dense=None, sparse=None):
+        self.size = int(size)
+        self._dense = None
+        self._dense_valid = False
+        self._sparse = np.zeros(0, dtype=np.int64)
+        self._bitset = None
+        if dense is not None:
+            self.dense = dense
+        elif sparse is not None:
+            self.sparse = sparse
+
+    @property
+    def dense(self):
+        """np.ndarray of uint8: One 0/1 entry per bit (the SDR's own buffer)."""
+        if not self._dense_valid:
+            dense = self._dense_buffer()
+            dense.fill(0)
+            dense[self._sparse] = 1
+            self._dense_valid = True
+        return self._dense
+
+    @dense.setter
+    def dense(self, values):
+        values = np.asarray(values)
+        if values.shape != (self.size,):
+            raise ValueError(f"Dense SDR values must have shape ({self.size},), got {values.shape}")
+        np.not_equal(values, 0, out=self._dense_buffer(), casting="unsafe")
+        self._dense_valid = True
+        self._sparse = None
+        self._bitset = None
+
+    def dense_modified(self):
+        """Drop the cached sparse and bitset views after writing into `dense` in place."""
+        self._dense_valid = True
+        self._sparse = None
+        self._bitset = None
+
+    @property
+    def sparse(self):
+        """np.ndarray of int: Indices of the active bits."""
+        if self._sparse is None:
+            self._sparse = np.flatnonzero(self._dense)
+        return self._sparse
+
+    @sparse.setter
+    def sparse(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.size and (indices.min() < 0 or indices.max() >= self.size):
+            raise ValueError(f"Sparse SDR indices must lie in [0, {self.size})")
+        self._sparse = indices
+        self._dense_valid = False
+        self._bitset = None
+
+    @property
+    def bitset(self):
+        """np.ndarray of uint8: The dense bits packed 8 per byte."""
+        if self._bitset is None:
+            self._bitset = np.packbits(self.dense)
+        return self._bitset
+
+    @property
+    def num_active(self):
+        """int: Number of active bits."""
+        return len(self.sparse)
+
+    def zero(self):
+        """Deactivate every bit."""
+        self.sparse = np.zeros(0, dtype=np.int64)
+
+    def overlap(self, other):
+        """
+        Args:
+            other (SDR): SDR of the same size.
+
+        Returns:
+            int: Number of bits active in both SDRs.
+        """
+        self._check_size(other)
+        return int(_POPCOUNT[np.bitwise_and(self.bitset, other.bitset)].sum(dtype=np.int64))
+
+    def union(self, other):
+        """
+        Args:
+            other (SDR): SDR of the same size.
+
+        Returns:
+            SDR: Bits active in either SDR.
+        """
+        self._check_size(other)
+        return SDR(self.size, dense=np.bitwise_or(self.dense, other.dense))
+
+    @classmethod
+    def concatenate(cls, sdrs):
+        """
+        Args:
+            sdrs (iterable of SDR): SDRs to place one after another.
+
+        Returns:
+            SDR: SDR whose size is the sum of the input sizes.
+        """
+        sdrs = list(sdrs)
+        sizes = [sdr.size for sdr in sdrs]
+        offsets = np.cumsum([0] + sizes[:-1])
+        indices = [sdr.sparse + offset for sdr, offset in zip(sdrs, offsets)]
+        return cls(sum(sizes), sparse=np.concatenate(indices) if indices else None)
+
+    def _dense_buffer(self):
+        if self._dense is None:
+            self._dense = np.zeros(self.size, dtype=np.uint8)
+        return self._dense
+
+    def _check_size(self, other):
+        if other.size != self.size:
+            raise ValueError(f"SDR sizes differ: {self.size} and {other.size}")
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self.dense
+        if dtype is not None and dense.dtype != dtype:
+            return dense.astype(dtype)
+        return dense.copy() if copy else dense
+
+    def __eq__(self, other):
+        if not isinstance(other, SDR):
+            return NotImplemented
+        return self.size == other.size and np.array_equal(self.dense, other.dense)
+
+    def __repr__(self):
+        return f"SDR({self.size}, sparse={self.sparse.tolist()})"
+
+
+def as_sparse(values):
+    """
+    Return the active indices of an SDR, or `values` unchanged otherwise.
+
+    Args:
+        values (SDR or array-like of int): SDR or active indices.
+
+    Returns:
+        np.ndarray or array-like of int: Active indices.
+    """
+    if isinstance(values, SDR):
+        return values.sparse
+    return values
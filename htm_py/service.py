@@ -0,0 +1,185 @@
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from htm_py.executor import load_config
+from htm_py.htm_model import HTMModel
+from htm_py.tracing import stream_config
+
+logger = logging.getLogger("AnomalyService")
+
+# Marks the end of the results queue after close()
+_DONE = object()
+
+
+class StreamError(RuntimeError):
+    """Raised from `AnomalyService.results` when a stream's model failed."""
+
+    def __init__(self, stream, error):
+        super().__init__(f"Stream {stream!r} failed: {error!r}")
+        self.stream = stream
+        self.error = error
+
+
+class AnomalyService:
+    """
+    asyncio front-end that feeds records from async producers into one
+    `HTMModel` per stream and delivers anomaly scores to async consumers.
+
+    Every stream has a bounded queue: `submit` waits while it is full, which
+    pushes back on the producer of that stream only. A per-stream task drains
+    the queue in micro-batches of up to `max_batch_size` records and runs
+    them with `HTMModel.run` on a thread pool, so the event loop stays
+    responsive and a slow model only delays its own stream. Results go to a
+    bounded queue read through `results()`; a consumer that falls behind
+    eventually slows the producers down as well.
+
+    Args:
+        config (dict, str or os.PathLike): Model config, or path to a YAML
+            file, used to build every stream's model.
+        max_queue_size (int): Records buffered per stream before `submit` waits.
+        max_batch_size (int): Records computed together per stream.
+        results_queue_size (int): Results buffered before the streams wait
+            for consumers; defaults to `max_queue_size`.
+        executor (concurrent.futures.Executor): Runs the blocking model
+            calls; defaults to a thread pool owned by the service.
+
+    Create the service inside the event loop that uses it: before Python
+    3.10 its asyncio queues bind to the loop current at construction.
+    """
+
+    def __init__(self, config, max_queue_size=1024, max_batch_size=64, results_queue_size=None,
+                 executor=None):
+        self.config = load_config(config)
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.models = {}
+
+        self._queues = {}
+        self._tasks = {}
+        self._results = asyncio.Queue(results_queue_size or max_queue_size)
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor()
+        self._closed = False
+
+    async def submit(self, stream, record):
+        """
+        Queue one record, waiting while the stream's buffer is full.
+
+        Args:
+            stream (str): Stream name.
+            record (dict): Input data for the stream's model.
+        """
+        if self._closed:
+            raise RuntimeError("AnomalyService is closed")
+        await self._queue_for(stream).put(record)
+
+    def pending(self, stream):
+        """
+        Args:
+            stream (str): Stream name.
+
+        Returns:
+            int: Records queued for the stream and not yet computed.
+        """
+        queue = self._queues.get(stream)
+        return queue.qsize() if queue is not None else 0
+
+    async def results(self):
+        """
+        Yield results until the service is closed and drained. Results of
+        one stream arrive in submission order.
+
+        A failed batch is raised as `StreamError`, which ends this iteration
+        for every stream. The results of the other streams stay queued: call
+        `results()` again to keep consuming them. The failed batch's records
+        get no results, and later batches of its stream still run.
+
+        Yields:
+            (str, dict, float, float): Stream name, record, anomaly score and
+                prediction count.
+
+        Raises:
+            StreamError: If a stream's model raised while computing a batch.
+        """
+        while True:
+            item = await self._results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, StreamError):
+                raise item
+            yield item
+
+    async def serve(self, host="127.0.0.1", port=0):
+        """
+        Accept records over a local socket as newline-delimited JSON objects
+        `{"stream": ..., "record": {...}}`. A connection is not read further
+        while its current record's stream is full.
+
+        Returns:
+            asyncio.base_events.Server: The listening server.
+        """
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def close(self):
+        """
+        Stop accepting records, wait until every queued record has been
+        computed, then end `results()`. Results must keep being consumed while
+        closing.
+        """
+        self._closed = True
+        for queue in self._queues.values():
+            await queue.join()
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await self._results.put(_DONE)
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _queue_for(self, stream):
+        queue = self._queues.get(stream)
+        if queue is None:
+            queue = self._queues[stream] = asyncio.Queue(self.max_queue_size)
+            self._tasks[stream] = asyncio.create_task(self._process_stream(stream, queue))
+        return queue
+
+    async def _process_stream(self, stream, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                model = self.models.get(stream)
+                if model is None:
+                    model = self.models[stream] = await loop.run_in_executor(
+                        self._executor, HTMModel, stream_config(self.config, stream))
+                anomaly_scores, prediction_counts = await loop.run_in_executor(
+                    self._executor, model.run, batch)
+            except Exception as error:
+                logger.exception("Stream %r failed on a batch of %d records", stream, len(batch))
+                await self._results.put(StreamError(stream, error))
+            else:
+                for record, anomaly_score, prediction_count in zip(
+                        batch, anomaly_scores.tolist(), prediction_counts.tolist()):
+                    await self._results.put((stream, record, anomaly_score, prediction_count))
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    stream, record = message["stream"], message["record"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Ignoring malformed message: %r", line[:200])
+                    continue
+                await self.submit(stream, record)
+        finally:
+            writer.close()
@@ -1,106 +1,461 @@
 import numpy as np
 import logging
+from htm_py.sdr import SDR
 
 logger = logging.getLogger("SpatialPooler")
 
+# Potential pools are sampled for blocks of columns whose random-key matrix has
+# at most this many entries, bounding the temporary memory of initialization.
+POOL_SAMPLING_BLOCK_ENTRIES = 1 << 22
+
+# compute_batch processes inputs in row blocks whose (rows x numColumns)
+# overlap matrix has at most this many entries.
+BATCH_OVERLAP_BLOCK_ENTRIES = 1 << 22
+
+# Connected-synapse matrices with at most this many (column, input) entries
+# are kept dense; larger ones use scipy.sparse CSR, so scipy is only needed
+# for large pools.
+DENSE_OVERLAP_MAX_ENTRIES = 1 << 22
+
 class SpatialPooler:
     def __init__(
         self,
         inputDimensions,
         columnDimensions,
         potentialPct=0.85,
+        potentialRadius=None,
         synPermActiveInc=0.003,
         synPermInactiveDec=0.0005,
         synPermConnected=0.2,
         boostStrength=0.0,
+        globalInhibition=True,
+        numActiveColumnsPerInhArea=40,
+        localAreaDensity=-1.0,
+        inhibitionRadius=None,
+        dutyCyclePeriod=100,
+        minPctDutyCycles=0.001,
         seed=42,
     ):
         self.inputDimensions = inputDimensions
         self.columnDimensions = columnDimensions
-        self.numInputs = np.prod(inputDimensions)
-        self.numColumns = np.prod(columnDimensions)
+        self.numInputs = int(np.prod(inputDimensions))
+        self.numColumns = int(np.prod(columnDimensions))
         self.potentialPct = potentialPct
+        self.potentialRadius = potentialRadius
         self.synPermActiveInc = synPermActiveInc
         self.synPermInactiveDec = synPermInactiveDec
         self.synPermConnected = synPermConnected
         self.boostStrength = boostStrength
+        self.globalInhibition = globalInhibition
+        self.numActiveColumnsPerInhArea = numActiveColumnsPerInhArea
+        self.localAreaDensity = localAreaDensity
+        self.inhibitionRadius = (
+            max(columnDimensions) if inhibitionRadius is None else inhibitionRadius
+        )
+        self.dutyCyclePeriod = dutyCyclePeriod
+        self.minPctDutyCycles = minPctDutyCycles
         self.seed = seed
         self.rng = np.random.default_rng(seed)
 
         # For each column, select a potential pool of input bits
-        self.potentialPools = np.array([
-            self.rng.choice(self.numInputs, size=int(self.numInputs * potentialPct), replace=False)
-            for _ in range(self.numColumns)
-        ])
+        self.potentialPools = self._init_potential_pools()
 
         # Initialize permanence values randomly in [0, 0.4)
-        self.permanences = np.array([
-            self.rng.uniform(0.0, 0.4, size=len(pool)) for pool in self.potentialPools
-        ])
+        self.permanences = self.rng.random(self.potentialPools.shape, dtype=np.float32)
+        self.permanences *= np.float32(0.4)
 
         # Initialize boost and duty cycles
         self.boostFactors = np.ones(self.numColumns)
         self.activeDutyCycles = np.zeros(self.numColumns)
         self.minDutyCycles = np.zeros(self.numColumns)
 
-    def compute(self, inputVector, learn=True):
-        inputVector = np.array(inputVector).astype(np.float32)
-        overlaps = np.zeros(self.numColumns)
+        self._init_connected_matrix()
+        self._init_input_index()
+        self._init_inhibition()
+
+    def _init_potential_pools(self):
+        """
+        Sample every column's potential pool: `potentialPct` of the input bits
+        within `potentialRadius` of the column's center in input space
+        (wrapping around the input edges), or of all input bits when no radius
+        is set. Each pool is a uniform sample without replacement, drawn by
+        keeping the smallest of a row of random keys.
+
+        Returns:
+            np.ndarray: (numColumns x poolSize) input indices in the smallest
+                unsigned dtype that holds them.
+        """
+        neighborhoods = self._input_neighborhoods()
+        neighborhoodSize = neighborhoods.shape[1]
+        poolSize = int(neighborhoodSize * self.potentialPct)
+        pools = np.empty((self.numColumns, poolSize), dtype=np.min_scalar_type(self.numInputs - 1))
+
+        blockSize = max(1, POOL_SAMPLING_BLOCK_ENTRIES // neighborhoodSize)
+        for start in range(0, self.numColumns, blockSize):
+            stop = min(start + blockSize, self.numColumns)
+            keys = self.rng.random((stop - start, neighborhoodSize), dtype=np.float32)
+            chosen = np.argpartition(keys, poolSize - 1, axis=1)[:, :poolSize] if poolSize else keys[:, :0]
+            block = neighborhoods if neighborhoods.shape[0] == 1 else neighborhoods[start:stop]
+            pools[start:stop] = np.take_along_axis(
+                np.broadcast_to(block, keys.shape), chosen, axis=1)
+        return pools
+
+    def _input_neighborhoods(self):
+        """
+        Returns:
+            np.ndarray of int: Candidate input bits per column, one row per
+                column, or a single shared row when there is no potentialRadius.
+        """
+        if self.potentialRadius is None:
+            return np.arange(self.numInputs)[None, :]
+
+        inputDims = np.asarray(self.inputDimensions, dtype=np.int64)
+        columnDims = np.asarray(self.columnDimensions, dtype=np.int64)
+        if inputDims.size != columnDims.size:
+            raise ValueError("potentialRadius requires inputs and columns with the same number of dimensions")
+
+        # Each column maps to the input coordinate at the same relative position
+        columnCoords = np.array(np.unravel_index(np.arange(self.numColumns), columnDims)).T
+        centers = ((columnCoords + 0.5) * inputDims / columnDims).astype(np.int64)
+
+        radius = int(self.potentialRadius)
+        coordRanges = [
+            (centers[:, [d]] + np.arange(-radius, radius + 1)) % size if 2 * radius + 1 < size
+            else np.broadcast_to(np.arange(size), (self.numColumns, size))
+            for d, size in enumerate(inputDims)
+        ]
+        # Cartesian product of the per-dimension ranges, flattened per column
+        grids = np.meshgrid(*[np.arange(r.shape[1]) for r in coordRanges], indexing="ij")
+        coords = [r[:, g.ravel()] for r, g in zip(coordRanges, grids)]
+        return np.ravel_multi_index(coords, inputDims)
+
+    def _init_inhibition(self):
+        """
+        Resolve the inhibition mode and the number of winners.
+
+        Local inhibition lets a column win when fewer than `numActive` columns
+        in its neighborhood (the hypercube of `inhibitionRadius` around it in
+        column topology, clipped at the edges) have a larger overlap. When the
+        radius covers the whole region every neighborhood is the full region,
+        so inhibition falls back to the global top-k.
+        """
+        if self.numActiveColumnsPerInhArea <= 0 and self.localAreaDensity <= 0:
+            raise ValueError("Either numActiveColumnsPerInhArea or localAreaDensity must be positive")
 
-        for i in range(self.numColumns):
-            pool = self.potentialPools[i]
-            perms = self.permanences[i]
-            connected = perms >= self.synPermConnected
-            overlaps[i] = np.sum(inputVector[pool][connected])
+        dims = tuple(int(d) for d in self.columnDimensions)
+        radius = int(self.inhibitionRadius)
+        self._useLocalInhibition = (
+            not self.globalInhibition and any(radius < d - 1 for d in dims)
+        )
 
-        # FIX: Use fixed-k inhibition instead of top-N%
-        k = 40  # Numenta typically uses 40
+        # A small density can round down to no winners; at least one column
+        # always wins
+        if not self._useLocalInhibition:
+            if self.localAreaDensity > 0:
+                self._numActiveGlobal = max(1, int(self.localAreaDensity * self.numColumns))
+            else:
+                self._numActiveGlobal = max(1, int(self.numActiveColumnsPerInhArea))
+            return
+
+        self._inhibitionWindow = tuple(min(2 * radius + 1, 2 * d - 1) for d in dims)
+        if self.localAreaDensity > 0:
+            density = self.localAreaDensity
+        else:
+            density = min(self.numActiveColumnsPerInhArea / np.prod(self._inhibitionWindow), 0.5)
+        neighborhoodSizes = self._neighborhoods(np.ones(self.numColumns), 0.0).sum(axis=1)
+        self._numActiveLocal = np.maximum(1, (0.5 + density * neighborhoodSizes).astype(np.int64))
+        self._columnIndexWindows = self._neighborhoods(np.arange(self.numColumns), -1)
+
+    def _neighborhoods(self, values, fill):
+        """
+        Args:
+            values (np.ndarray): One value per column.
+            fill: Value for neighborhood positions outside the region.
+
+        Returns:
+            np.ndarray: (numColumns x windowSize) view whose row i holds the
+                values of every position in column i's neighborhood.
+        """
+        dims = tuple(int(d) for d in self.columnDimensions)
+        pads = [((w - 1) // 2, (w - 1) // 2) for w in self._inhibitionWindow]
+        padded = np.pad(values.reshape(dims), pads, constant_values=fill)
+        # Read-only sliding windows; np.lib.stride_tricks.sliding_window_view
+        # needs NumPy 1.20
+        windows = np.lib.stride_tricks.as_strided(
+            padded,
+            shape=tuple(np.subtract(padded.shape, self._inhibitionWindow) + 1) + self._inhibitionWindow,
+            strides=padded.strides * 2,
+            writeable=False,
+        )
+        return windows.reshape(self.numColumns, -1)
+
+    def _inhibit_columns(self, overlaps):
+        """
+        Args:
+            overlaps (np.ndarray): (Boosted) overlap per column.
+
+        Returns:
+            np.ndarray of int: Active columns, strongest overlap first.
+        """
+        if self._useLocalInhibition:
+            return self._inhibit_columns_local(overlaps)
+        return self._inhibit_columns_global(overlaps)
+
+    def _inhibit_columns_global(self, overlaps):
+        k = self._numActiveGlobal
         if k >= self.numColumns:
-            active_columns = np.arange(self.numColumns)
+            return np.arange(self.numColumns)
+        top_k_indices = np.argpartition(overlaps, -k)[-k:]
+        # Optionally sort them to have the strongest overlaps first
+        return top_k_indices[np.argsort(-overlaps[top_k_indices])]
+
+    def _inhibit_columns_local(self, overlaps):
+        # Vectorized over all neighborhoods at once; ties go to the lower
+        # column index so every neighborhood makes the same decision.
+        neighborOverlaps = self._neighborhoods(overlaps, -np.inf)
+        own = overlaps[:, None]
+        ownIndex = np.arange(self.numColumns)[:, None]
+        bigger = (neighborOverlaps > own) | (
+            (neighborOverlaps == own) & (self._columnIndexWindows < ownIndex)
+            & (self._columnIndexWindows >= 0)
+        )
+        active = np.flatnonzero(bigger.sum(axis=1) < self._numActiveLocal)
+        return active[np.argsort(-overlaps[active], kind="stable")]
+
+    def _init_connected_matrix(self):
+        """
+        Build the (numColumns x numInputs) connected-synapse matrix, so that
+        every column's overlap is one matrix-vector product.
+
+        Small matrices are dense float32. Larger ones are CSR with one stored
+        entry per potential synapse (0 while disconnected): the sparsity
+        structure then never changes, and connectivity updates only rewrite
+        `data`.
+        """
+        numColumns, poolSize = self.potentialPools.shape
+        self._connectedMask = self.permanences >= self.synPermConnected
+        if numColumns * self.numInputs <= DENSE_OVERLAP_MAX_ENTRIES:
+            self._connectedMatrix = np.zeros((numColumns, self.numInputs), dtype=np.float32)
+            rows = np.repeat(np.arange(numColumns), poolSize).reshape(numColumns, poolSize)
+            self._connectedMatrix[rows, self.potentialPools] = self._connectedMask
+        else:
+            from scipy import sparse
+            self._connectedMatrix = sparse.csr_matrix(
+                (
+                    self._connectedMask.ravel().astype(np.float32),
+                    self.potentialPools.ravel(),
+                    np.arange(0, numColumns * poolSize + 1, poolSize),
+                ),
+                shape=(numColumns, self.numInputs),
+            )
+
+    def _update_connected(self, columns):
+        """
+        Bring the connected-synapse structure up to date after the permanences
+        of `columns` changed. Only synapses that crossed `synPermConnected`
+        are written.
+
+        Args:
+            columns (np.ndarray of int): Columns whose permanences changed.
+        """
+        connected = self.permanences[columns] >= self.synPermConnected
+        rows, slots = np.nonzero(connected != self._connectedMask[columns])
+        if rows.size == 0:
+            return
+        columns = columns[rows]
+        values = connected[rows, slots]
+        self._connectedMask[columns, slots] = values
+        if not isinstance(self._connectedMatrix, np.ndarray):
+            poolSize = self.potentialPools.shape[1]
+            self._connectedMatrix.data[columns * poolSize + slots] = values
         else:
-            top_k_indices = np.argpartition(overlaps, -k)[-k:]
-            # Optionally sort them to have the strongest overlaps first
-            active_columns = top_k_indices[np.argsort(-overlaps[top_k_indices])]
+            self._connectedMatrix[columns, self.potentialPools[columns, slots]] = values
+
+    def _init_input_index(self):
+        """
+        Build the inverted index from each input bit to the potential synapses
+        on it: `_inputSynapseSlots[_inputSynapseStarts[i]:_inputSynapseStarts[i + 1]]`
+        are flat (column * poolSize + slot) synapse positions on input bit i,
+        and `_inputSynapseColumns` holds their columns.
+        """
+        poolSize = self.potentialPools.shape[1]
+        flatInputs = self.potentialPools.ravel()
+        self._inputSynapseSlots = np.argsort(flatInputs, kind="stable")
+        self._inputSynapseColumns = self._inputSynapseSlots // poolSize
+        self._inputSynapseStarts = np.concatenate((
+            [0], np.cumsum(np.bincount(flatInputs, minlength=self.numInputs))
+        ))
+
+    def _compute_sparse_overlaps(self, activeInputs):
+        """
+        Accumulate overlaps by visiting only the synapses on active input bits.
+
+        Args:
+            activeInputs (np.ndarray of int): Indices of the active input bits.
+
+        Returns:
+            np.ndarray of float32: Number of active connected synapses per column.
+        """
+        starts = self._inputSynapseStarts[activeInputs]
+        counts = self._inputSynapseStarts[activeInputs + 1] - starts
+        # Concatenation of the ranges [start, start + count) for every active bit
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = offsets + np.arange(offsets.size)
+        connected = self._connectedMask.ravel()[self._inputSynapseSlots[positions]]
+        overlaps = np.bincount(
+            self._inputSynapseColumns[positions[connected]], minlength=self.numColumns
+        )
+        return overlaps.astype(np.float32)
+
+    def _compute_overlaps(self, inputVector):
+        """
+        Args:
+            inputVector (np.ndarray of float32): Dense input of length numInputs.
+
+        Returns:
+            np.ndarray: Number of active connected synapses per column.
+        """
+        return self._connectedMatrix @ inputVector
+
+    def compute(self, inputVector, learn=True):
+        """
+        Args:
+            inputVector (SDR or array-like): Dense input of length numInputs.
+            learn (bool): Whether to adapt permanences and duty cycles.
+
+        Returns:
+            np.ndarray of int: Active columns, strongest overlap first.
+        """
+        if isinstance(inputVector, SDR):
+            inputVector = inputVector.dense
+        inputVector = np.asarray(inputVector, dtype=np.float32)
+        return self._compute(self._compute_overlaps(inputVector), inputVector, learn)
+
+    def compute_sparse(self, activeInputs, learn=True):
+        """
+        Same as `compute` for an input given as the indices of its active bits.
+        The overlap cost is proportional to the number of active bits rather
+        than to the input width.
+
+        Args:
+            activeInputs (SDR or array-like of int): Indices of the active input bits.
+            learn (bool): Whether to adapt permanences and duty cycles.
+
+        Returns:
+            np.ndarray of int: Active columns, strongest overlap first.
+        """
+        if isinstance(activeInputs, SDR):
+            activeInputs = activeInputs.sparse
+        activeInputs = np.unique(np.asarray(activeInputs, dtype=np.int64))
+        inputVector = None
+        if learn:
+            inputVector = np.zeros(self.numInputs, dtype=np.float32)
+            inputVector[activeInputs] = 1.0
+        return self._compute(self._compute_sparse_overlaps(activeInputs), inputVector, learn)
+
+    def compute_batch(self, inputs, learn=False):
+        """
+        Run `compute` over many inputs. Without learning the overlaps of a
+        block of rows come from one matrix product and global inhibition is a
+        row-wise top-k; each result equals what `compute` returns for that row.
+        Learning depends on input order, so `learn=True` runs the rows in
+        sequence.
+
+        Args:
+            inputs (array-like): (N x numInputs) dense inputs, one per row.
+            learn (bool): Whether to adapt permanences and duty cycles.
+
+        Returns:
+            list of np.ndarray of int: Active columns of every row, strongest
+                overlap first.
+        """
+        inputs = np.asarray(inputs, dtype=np.float32)
+        if learn:
+            return [self.compute(inputVector, learn=True) for inputVector in inputs]
+
+        results = []
+        blockRows = max(1, BATCH_OVERLAP_BLOCK_ENTRIES // self.numColumns)
+        for start in range(0, len(inputs), blockRows):
+            overlaps = np.asarray((self._connectedMatrix @ inputs[start:start + blockRows].T).T)
+            if self.boostStrength > 0.0:
+                overlaps = overlaps * self.boostFactors
+            if self._useLocalInhibition:
+                results.extend(self._inhibit_columns_local(row) for row in overlaps)
+                continue
+
+            k = self._numActiveGlobal
+            if k >= self.numColumns:
+                results.extend(np.arange(self.numColumns) for _ in overlaps)
+                continue
+            top_k_indices = np.argpartition(overlaps, -k, axis=1)[:, -k:]
+            top_k_overlaps = np.take_along_axis(overlaps, top_k_indices, axis=1)
+            order = np.argsort(-top_k_overlaps, axis=1)
+            results.extend(np.take_along_axis(top_k_indices, order, axis=1))
+        return results
+
+    def _compute(self, overlaps, inputVector, learn):
+        if self.boostStrength > 0.0:
+            overlaps = overlaps * self.boostFactors
+
+        active_columns = self._inhibit_columns(overlaps)
 
         if learn:
             self._adapt_permanences(inputVector, active_columns)
             self._update_duty_cycles(active_columns)
+            self._update_min_duty_cycles()
             self._update_boost_factors()
 
         return active_columns
 
     def _adapt_permanences(self, inputVector, active_columns):
-        for i in active_columns:
-            pool = self.potentialPools[i]
-            perms = self.permanences[i]
-            inputBits = inputVector[pool]
-            perms += self.synPermActiveInc * inputBits
-            perms -= self.synPermInactiveDec * (1 - inputBits)
-            self.permanences[i] = np.clip(perms, 0.0, 1.0)
+        """
+        Reinforce the potential synapses of the active columns on active input
+        bits and weaken the rest, as one operation on the (active x poolSize)
+        permanence block.
+        """
+        active_columns = np.asarray(active_columns)
+        perms = self.permanences[active_columns]
+        inputBits = inputVector[self.potentialPools[active_columns]]
+        perms += self.synPermActiveInc * inputBits
+        perms -= self.synPermInactiveDec * (1 - inputBits)
+        np.clip(perms, 0.0, 1.0, out=perms)
+        self.permanences[active_columns] = perms
+        self._update_connected(active_columns)
 
     def _update_duty_cycles(self, active_columns):
-        decay = 0.99
+        decay = (self.dutyCyclePeriod - 1) / self.dutyCyclePeriod
         self.activeDutyCycles *= decay
         self.activeDutyCycles[active_columns] += (1.0 - decay)
 
+    def _update_min_duty_cycles(self):
+        # Each column's floor is a fraction of the busiest duty cycle in its
+        # inhibition area: the whole region under global inhibition.
+        if self._useLocalInhibition:
+            maxDuty = self._neighborhoods(self.activeDutyCycles, 0.0).max(axis=1)
+            np.multiply(self.minPctDutyCycles, maxDuty, out=self.minDutyCycles)
+        else:
+            self.minDutyCycles.fill(self.minPctDutyCycles * self.activeDutyCycles.max())
+
     def _update_boost_factors(self):
+        """
+        Boost columns whose duty cycle fell below their minimum, from 1 at the
+        minimum up to exp(boostStrength) for a column that never wins.
+        """
+        self.boostFactors.fill(1.0)
         # No boosting if boostStrength is zero
         if self.boostStrength == 0.0:
-            self.boostFactors[:] = 1.0
             return
 
-        maxDuty = np.max(self.activeDutyCycles)
-        for i in range(self.numColumns):
-            if self.activeDutyCycles[i] > self.minDutyCycles[i]:
-                self.boostFactors[i] = 1.0
-            else:
-                self.boostFactors[i] = np.exp(-self.boostStrength * (self.minDutyCycles[i] - self.activeDutyCycles[i]))
+        weak = self.activeDutyCycles < self.minDutyCycles
+        self.boostFactors[weak] = np.exp(
+            self.boostStrength * (1.0 - self.activeDutyCycles[weak] / self.minDutyCycles[weak])
+        )
 
     def get_permanences(self):
         return self.permanences
 
     def get_connected_synapses(self):
         return [
-            pool[perms >= self.synPermConnected]
-            for pool, perms in zip(self.potentialPools, self.permanences)
+            pool[connected]
+            for pool, connected in zip(self.potentialPools, self._connectedMask)
         ]
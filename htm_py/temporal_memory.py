@@ -1,11 +1,11 @@
 import numpy as np
+import logging
+from htm_py.cell_state import CellSet
 from htm_py.connections import Connections
-import os
+from htm_py.sdr import as_sparse
+from htm_py.tracing import NULL_TRACER
 
-tm_trace_path = "results/tm_phase_trace.csv"
-if not os.path.exists(tm_trace_path):
-    with open(tm_trace_path, "w") as f:
-        f.write("timestep,phase,event,cell,segment,info\n")
+logger = logging.getLogger("TemporalMemory")
 
 
 class TemporalMemory:
@@ -13,7 +13,9 @@ class TemporalMemory:
                  initial_permanence, connected_permanence, min_threshold,
                  max_new_synapse_count, permanence_increment, permanence_decrement,
                  predicted_segment_decrement, seed=None, max_segments_per_cell=255,
-                 max_synapses_per_segment=255, check_inputs=False):
+                 max_synapses_per_segment=255, check_inputs=False, tracer=None,
+                 gc_interval=None, gc_memory_threshold=None, gc_permanence_floor=0.0,
+                 dense_cell_state=False):
         self.column_dimensions = column_dimensions
         self.cells_per_column = cells_per_column
         self.activation_threshold = activation_threshold
@@ -28,24 +30,53 @@ class TemporalMemory:
 
         self.max_segments_per_cell = max_segments_per_cell
         self.max_synapses_per_segment = max_synapses_per_segment
+        self.num_columns = int(np.prod(column_dimensions))
 
-        self.seed = seed if seed is not None else np.random.randint(0, 100000)
-        np.random.seed(self.seed)
+        # Garbage collection of dead synapses / empty segments: every
+        # `gc_interval` steps and/or when Connections storage reaches
+        # `gc_memory_threshold` bytes. Both default to off.
+        self.gc_interval = gc_interval
+        self.gc_memory_threshold = gc_memory_threshold
+        self.gc_permanence_floor = gc_permanence_floor
+        self._gc_next_memory_threshold = gc_memory_threshold
 
-        # Model state
-        self.active_cells = set()
-        self.winner_cells = set()
+        self.seed = seed if seed is not None else np.random.randint(0, 100000)
+        # Private random state, so models sharing a process do not perturb
+        # each other's draws
+        self.rng = np.random.RandomState(self.seed)
+
+        # Model state. With dense_cell_state the cell sets are preallocated
+        # bool masks + index arrays (CellSet) instead of Python sets. Either
+        # way the previous step's sets are kept as spare buffers and swapped
+        # in by activate_cells rather than copied.
+        self.dense_cell_state = dense_cell_state
+        if dense_cell_state:
+            num_cells = self.num_columns * cells_per_column
+            self.active_cells, self._spare_active_cells = CellSet(num_cells), CellSet(num_cells)
+            self.winner_cells, self._spare_winner_cells = CellSet(num_cells), CellSet(num_cells)
+        else:
+            self.active_cells, self._spare_active_cells = set(), set()
+            self.winner_cells, self._spare_winner_cells = set(), set()
         self.active_segments = set()
         self.matching_segments = set()
-        
-        self.connections = Connections()
+        self.num_active_potential_synapses_for_segment = np.zeros(0, dtype=np.int32)
 
         # Additional state for learning
         self.iteration = 0
-        self.last_used_iteration_for_segment = {}
+
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.connections = Connections(tracer=self.tracer, rng=self.rng)
+        # Last: reads the state set above
+        self._cache_predictive_state()
 
 
     def compute(self, active_columns, learn=True):
+        active_columns = as_sparse(active_columns)
+        if self.check_inputs:
+            columns = np.asarray(active_columns)
+            if columns.size and (columns.min() < 0 or columns.max() >= self.num_columns):
+                raise ValueError(f"Active columns must lie in [0, {self.num_columns})")
+
         self.activate_dendrites(learn)
         self.activate_cells(active_columns, learn)
 
@@ -53,31 +84,21 @@ class TemporalMemory:
         anomaly = self.anomaly_score(active_columns)
 
         num_active_columns = len(active_columns)
-        num_predictive_cells = len(self.get_predictive_cells())
+        num_predictive_cells = len(self.predictive_cells)
 
         # === Phase 3: Prediction Accuracy Logging BEFORE advancing iteration ===
-        predicted_cells = self.get_predictive_cells()
-        predicted_columns = set(
-            self.connections.column_for_cell(cell, self.cells_per_column) 
-            for cell in predicted_cells
-        )
-
-        active_columns_set = set(active_columns)
-        correct_predictions = predicted_columns.intersection(active_columns_set)
-        wrong_predictions = predicted_columns - active_columns_set
-
-        log_path = "results/tm_phase3_prediction_accuracy_detailed.csv"
-        if not os.path.exists(log_path):
-            with open(log_path, "w") as f:
-                f.write("timestep,predicted_column,is_correct\n")
-
-        with open(log_path, "a") as f:
-            for col in predicted_columns:
-                is_correct = int(col in correct_predictions)
-                f.write(f"{self.iteration},{col},{is_correct}\n")
+        if self.tracer.enabled("tm_phase3_prediction_accuracy_detailed"):
+            correct = np.isin(self.predictive_columns, np.asarray(active_columns))
+            self.tracer.emit_rows("tm_phase3_prediction_accuracy_detailed", (
+                (self.iteration, col, int(is_correct))
+                for col, is_correct in zip(self.predictive_columns.tolist(), correct.tolist())
+            ))
 
         prediction_count = (num_predictive_cells / num_active_columns) if num_active_columns > 0 else 0.0
 
+        if learn and self._gc_due():
+            self.garbage_collect()
+
         # Phase 3: Advance time AFTER logging
         self.iteration += 1
 
@@ -91,65 +112,78 @@ class TemporalMemory:
         Args:
             learn (bool): If True, learning updates will be applied.
         """
+        trace = self.tracer.enabled("tm_phase_trace")
+        if trace:
+            self.tracer.emit_rows("tm_phase_trace", (
+                (self.iteration, "Phase1", "SegmentActive",
+                 self.connections.cell_for_segment(segment), segment, "active_connected_synapses")
+                for segment in self.active_segments
+            ))
+            self.tracer.emit_rows("tm_phase_trace", (
+                (self.iteration, "Phase1", "SegmentMatching",
+                 self.connections.cell_for_segment(segment), segment, "active_potential_synapses")
+                for segment in self.matching_segments
+            ))
+
+        # Accumulate per-segment activity from the active cells' outgoing synapses
+        num_active_connected, num_active_potential = self.connections.compute_activity(
+            self.active_cells, self.connected_permanence
+        )
+        self.num_active_potential_synapses_for_segment = num_active_potential
 
-        with open(tm_trace_path, "a") as f:
-            for segment in self.active_segments:
-                cell = self.connections.cell_for_segment(segment)
-                f.write(f"{self.iteration},Phase1,SegmentActive,{cell},{segment},active_connected_synapses\n")
-            for segment in self.matching_segments:
-                cell = self.connections.cell_for_segment(segment)
-                f.write(f"{self.iteration},Phase1,SegmentMatching,{cell},{segment},active_potential_synapses\n")
-
-        self.active_segments = set()
-        self.matching_segments = set()
-
-        # Precompute segment activations
-        for segment in self.connections.segments():
-            active_connected_synapses = self.connections.num_active_connected_synapses(
-                segment, self.active_cells, self.connected_permanence
-            )
-
-            if active_connected_synapses >= self.activation_threshold:
-                self.active_segments.add(segment)
-
-            active_potential_synapses = self.connections.num_active_potential_synapses(
-                segment, self.active_cells
-            )
-
-            if active_potential_synapses >= self.min_threshold:
-                self.matching_segments.add(segment)
+        self.active_segments = set(
+            np.flatnonzero(num_active_connected >= self.activation_threshold).tolist()
+        )
+        self.matching_segments = set(
+            np.flatnonzero(num_active_potential >= self.min_threshold).tolist()
+        )
+        self._cache_predictive_state()
 
         if learn:
-            print(f"Iteration {self.iteration}: matching_segments = {self.matching_segments}")
-            print(f"Iteration {self.iteration}: active_segments = {self.active_segments}")
-            for segment in self.matching_segments:
-                if segment not in self.active_segments:
-                    self.connections.adapt_segment(
-                        segment,
-                        prev_active_cells=self.active_cells,
-                        permanence_increment=0.0,
-                        permanence_decrement=self.predicted_segment_decrement,
-                        iteration=self.iteration
-                    )
-                    with open("results/tm_phase_trace.csv", "a") as f:
-                        f.write(f"{self.iteration},Phase1,PredictedSegmentDecrementApplied,,{segment},failed_prediction\n")
+            self.connections.record_segment_usage(self.active_segments, self.iteration)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Iteration %d: matching_segments = %s", self.iteration, self.matching_segments)
+                logger.debug("Iteration %d: active_segments = %s", self.iteration, self.active_segments)
+            # Punish all matching segments that failed to become active in one batch
+            punished_segments = [
+                segment for segment in self.matching_segments
+                if segment not in self.active_segments
+            ]
+            self.connections.adapt_segments(
+                punished_segments,
+                prev_active_cells=self.active_cells,
+                permanence_increment=0.0,
+                permanence_decrement=self.predicted_segment_decrement,
+                iteration=self.iteration
+            )
+            if trace:
+                self.tracer.emit_rows("tm_phase_trace", (
+                    (self.iteration, "Phase1", "PredictedSegmentDecrementApplied", None, segment, "failed_prediction")
+                    for segment in punished_segments
+                ))
 
 
     def activate_cells(self, active_columns, learn=True):
         """
         Phase 2: Activate cells based on predictive state or burst if necessary.
         """
-        prev_active_cells = self.active_cells.copy()
-        prev_winner_cells = self.winner_cells.copy()
+        trace = self.tracer.enabled("tm_phase_trace")
+        # Double-buffered swap: last step's cells become prev_*, and the
+        # buffers that held prev_* one step ago are cleared and reused.
+        prev_active_cells, self.active_cells = self.active_cells, self._spare_active_cells
+        prev_winner_cells, self.winner_cells = self.winner_cells, self._spare_winner_cells
+        self._spare_active_cells, self._spare_winner_cells = prev_active_cells, prev_winner_cells
 
         self.active_cells.clear()
         self.winner_cells.clear()
 
+        # Learning is collected per step and applied in bulk after the column loop
+        segments_to_reinforce = []
+        segments_to_grow = []
+
         for column in active_columns:
-            predictive_cells = [
-                cell for cell in self.cells_for_column(column)
-                if self.connections.is_cell_predictive(cell, self.active_segments)
-            ]
+            predictive_cells = self._predictive_cells_by_column.get(column, ())
 
             if predictive_cells:
                 # Predicted Column Activation
@@ -160,66 +194,107 @@ class TemporalMemory:
                         segments = self.connections.segments_for_cell(cell)
                         for segment in segments:
                             if segment in self.active_segments:
-                                self.connections.adapt_segment(
-                                    segment, prev_active_cells,
-                                    self.permanence_increment, self.permanence_decrement, self.iteration
-                                )
-                                with open(tm_trace_path, "a") as f:
-                                    f.write(f"{self.iteration},Phase2,AdaptSegment,{cell},{segment},predicted\n")
+                                segments_to_reinforce.append(segment)
+                                if trace:
+                                    self.tracer.emit("tm_phase_trace", (
+                                        self.iteration, "Phase2", "AdaptSegment", cell, segment, "predicted"))
             else:
                 # Bursting Column - No predictions available
-                for cell in self.cells_for_column(column):
-                    self.active_cells.add(cell)
+                self.active_cells.update(self.cells_for_column(column))
 
                 winner_cell = self.select_winner_cell(column)
                 self.winner_cells.add(winner_cell)
 
-                with open(tm_trace_path, "a") as f:
-                    f.write(f"{self.iteration},Phase2,BurstWinnerCell,{winner_cell},,burst\n")
+                if trace:
+                    self.tracer.emit("tm_phase_trace", (
+                        self.iteration, "Phase2", "BurstWinnerCell", winner_cell, None, "burst"))
 
                 if learn:
-                    matching_segments = self.connections.matching_segments_for_column(
-                        column, self.cells_per_column, prev_active_cells, self.min_threshold
-                    )
+                    # Reuse the potential counts from activate_dendrites: they were
+                    # computed against the same cells that are now prev_active_cells.
+                    matching_segments = [
+                        segment
+                        for cell in self.cells_for_column(column)
+                        for segment in self.connections.segments_for_cell(cell)
+                        if segment in self.matching_segments
+                    ]
 
                     if matching_segments:
                         best_segment = max(
                             matching_segments,
-                            key=lambda s: self.connections.num_active_potential_synapses(s, prev_active_cells)
-                        )
-                        self.connections.adapt_segment(
-                            best_segment, prev_active_cells,
-                            self.permanence_increment, self.permanence_decrement, self.iteration
+                            key=lambda s: self.num_active_potential_synapses_for_segment[s]
                         )
-                        with open(tm_trace_path, "a") as f:
-                            f.write(f"{self.iteration},Phase2,AdaptSegment,{winner_cell},{best_segment},burst_matched\n")
+                        segments_to_reinforce.append(best_segment)
+                        if trace:
+                            self.tracer.emit("tm_phase_trace", (
+                                self.iteration, "Phase2", "AdaptSegment", winner_cell, best_segment, "burst_matched"))
                     else:
                         # Always grow a new segment if no matching segment found!
-                        new_segment = self.connections.create_segment(winner_cell)
-                        self.connections.grow_synapses(
-                            new_segment, prev_winner_cells,
-                            self.initial_permanence, self.max_new_synapse_count
-                        )
-                        with open(tm_trace_path, "a") as f:
-                            f.write(f"{self.iteration},Phase2,SegmentGrown,{winner_cell},{new_segment},new_segment_burst\n")
+                        new_segment = self.create_segment(winner_cell)
+                        segments_to_grow.append(new_segment)
+                        if trace:
+                            self.tracer.emit("tm_phase_trace", (
+                                self.iteration, "Phase2", "SegmentGrown", winner_cell, new_segment, "new_segment_burst"))
 
-        segment_log_path = "results/tm_segment_growth_trace.csv"
-        if not os.path.exists(segment_log_path):
-            with open(segment_log_path, "w") as f:
-                f.write("timestep,total_segments,total_synapses,avg_permanence\n")
+        if learn:
+            self.connections.adapt_segments(
+                segments_to_reinforce, prev_active_cells,
+                self.permanence_increment, self.permanence_decrement, self.iteration
+            )
+            self.connections.record_segment_usage(segments_to_reinforce, self.iteration)
+            self.connections.grow_synapses_batch(
+                segments_to_grow, prev_winner_cells,
+                self.initial_permanence, self.max_new_synapse_count,
+                max_synapses_per_segment=self.max_synapses_per_segment
+            )
 
-        # Collect total segments and synapse permanence data
-        total_segments = len(self.connections.segment_to_synapses)
-        all_permanences = [
-            self.connections.synapse_data[synapse_id][1]
-            for synapse_ids in self.connections.segment_to_synapses.values()
-            for synapse_id in synapse_ids
-        ]
-        total_synapses = len(all_permanences)
-        avg_permanence = np.mean(all_permanences) if total_synapses > 0 else 0.0
+        if self.tracer.enabled("tm_segment_growth_trace"):
+            stats = self.connections.stats()
+            self.tracer.emit("tm_segment_growth_trace", (
+                self.iteration, stats["num_segments"], stats["num_synapses"], stats["avg_permanence"]))
 
-        with open(segment_log_path, "a") as f:
-            f.write(f"{self.iteration},{total_segments},{total_synapses},{avg_permanence:.4f}\n")
+
+    def _gc_due(self):
+        """
+        Returns:
+            bool: Whether the scheduled or memory-triggered GC should run now.
+        """
+        if self.gc_interval and (self.iteration + 1) % self.gc_interval == 0:
+            return True
+        return (
+            self._gc_next_memory_threshold is not None
+            and self.connections.storage_nbytes() >= self._gc_next_memory_threshold
+        )
+
+
+    def garbage_collect(self):
+        """
+        Remove synapses at or below `gc_permanence_floor` and empty segments,
+        compact Connections storage and translate the segment IDs held in the
+        TM state to the compacted IDs.
+        """
+        segment_map, _ = self.connections.garbage_collect(self.gc_permanence_floor)
+
+        def remap(segments):
+            return {int(segment_map[s]) for s in segments if segment_map[s] >= 0}
+
+        self.active_segments = remap(self.active_segments)
+        self.matching_segments = remap(self.matching_segments)
+
+        counts = self.num_active_potential_synapses_for_segment
+        kept = segment_map[:len(counts)] >= 0
+        remapped = np.zeros(self.connections.stats()["num_segments"], dtype=counts.dtype)
+        remapped[segment_map[:len(counts)][kept]] = counts[kept]
+        self.num_active_potential_synapses_for_segment = remapped
+
+        if self.gc_memory_threshold is not None:
+            # Avoid re-collecting every step when live data alone nears the threshold
+            self._gc_next_memory_threshold = max(
+                self.gc_memory_threshold, 2 * self.connections.storage_nbytes())
+
+        stats = self.connections.stats()
+        logger.debug("Iteration %d: garbage collected, %d segments / %d synapses remain",
+                     self.iteration, stats["num_segments"], stats["num_synapses"])
 
 
     def select_winner_cell(self, column):
@@ -247,7 +322,55 @@ class TemporalMemory:
             elif num_segments == min_segments:
                 candidate_cells.append(cell)
 
-        return np.random.choice(candidate_cells)
+        return self.rng.choice(candidate_cells)
+
+
+    def _cache_predictive_state(self):
+        """
+        Derive the predictive cells and columns from `active_segments` once per
+        timestep. The cached arrays are read-only and stay valid until the next
+        `activate_dendrites` call.
+        """
+        if self.active_segments:
+            cells = np.unique(self.connections.cells_for_segments(list(self.active_segments)))
+        else:
+            cells = np.zeros(0, dtype=np.int64)
+        columns = np.unique(cells // self.cells_per_column)
+        column_mask = np.zeros(self.num_columns, dtype=bool)
+        column_mask[columns[columns < self.num_columns]] = True
+
+        for array in (cells, columns, column_mask):
+            array.setflags(write=False)
+        self._predictive_cells = cells
+        self._predictive_columns = columns
+        self._predictive_column_mask = column_mask
+
+        self._predictive_cells_by_column = {}
+        for cell in cells.tolist():
+            self._predictive_cells_by_column.setdefault(cell // self.cells_per_column, []).append(cell)
+
+        if self.tracer.enabled("tm_phase3_prediction_trace"):
+            self.tracer.emit_rows("tm_phase3_prediction_trace", (
+                (self.iteration, cell, cell // self.cells_per_column) for cell in cells.tolist()
+            ))
+
+
+    @property
+    def predictive_cells(self):
+        """np.ndarray of int: Sorted, read-only indices of the predictive cells."""
+        return self._predictive_cells
+
+
+    @property
+    def predictive_columns(self):
+        """np.ndarray of int: Sorted, read-only indices of columns with a predictive cell."""
+        return self._predictive_columns
+
+
+    @property
+    def predictive_column_mask(self):
+        """np.ndarray of bool: Read-only mask over columns, True where a cell is predictive."""
+        return self._predictive_column_mask
 
 
     def get_predictive_cells(self):
@@ -257,22 +380,7 @@ class TemporalMemory:
         Returns:
             set of int: Indices of predictive cells.
         """
-        with open("results/tm_phase3_prediction_trace.csv", "a") as f:
-            if self.iteration == 0:  # Write header only once
-                f.write("timestep,predictive_cell,column\n")
-
-            for segment in self.active_segments:
-                cell = self.connections.cell_for_segment(segment)
-                column = self.connections.column_for_cell(cell, self.cells_per_column)
-                f.write(f"{self.iteration},{cell},{column}\n")
-
-        predictive_cells = set()
-
-        for segment in self.active_segments:
-            cell = self.connections.cell_for_segment(segment)
-            predictive_cells.add(cell)
-
-        return predictive_cells
+        return set(self._predictive_cells.tolist())
 
 
     def cells_for_column(self, column):
@@ -292,15 +400,26 @@ class TemporalMemory:
 
     def create_segment(self, cell):
         """
-        Creates a new segment on the given cell. Handles segment limits.
+        Creates a new segment on the given cell. Handles segment limits: when the
+        cell already holds `max_segments_per_cell` segments, its least recently
+        used segments are destroyed first.
 
         Args:
             cell (int): The cell index to create the segment on.
 
         Returns:
-            Segment object or ID from Connections.
+            int: Segment ID from Connections.
         """
-        return self.connections.create_segment(cell)
+        while 0 < self.max_segments_per_cell <= self.connections.num_segments(cell):
+            evicted = self.connections.least_recently_used_segment(cell)
+            self.connections.destroy_segment(evicted)
+            if self.tracer.enabled("tm_phase_trace"):
+                self.tracer.emit("tm_phase_trace", (
+                    self.iteration, "Phase2", "SegmentEvicted", cell, evicted, "least_recently_used"))
+
+        segment = self.connections.create_segment(cell)
+        self.connections.record_segment_usage([segment], self.iteration)
+        return segment
 
 
     def anomaly_score(self, active_columns):
@@ -318,12 +437,9 @@ class TemporalMemory:
         if num_active_columns == 0:
             return 0.0  # No activity, no anomaly.
 
-        predictive_columns = set(
-            self.connections.column_for_cell(cell, self.cells_per_column)
-            for cell in self.get_predictive_cells()
-        )
-
-        num_predicted_columns = sum(1 for col in active_columns if col in predictive_columns)
+        num_predicted_columns = int(np.count_nonzero(
+            np.isin(np.asarray(active_columns), self._predictive_columns)
+        ))
 
         return 1.0 - (num_predicted_columns / num_active_columns)
 
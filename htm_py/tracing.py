@@ -0,0 +1,245 @@
+import os
+import re
+import copy
+import atexit
+import queue
+import threading
+
+# Trace levels, ordered like the logging module: lower values are more verbose.
+DETAIL = 10   # per-segment / per-synapse events
+SUMMARY = 20  # one record per timestep
+
+# Known trace events: name -> (level, CSV header). Each event is written to
+# "<directory>/<prefix><name>.csv".
+EVENTS = {
+    "segment_adapt_debug": (
+        DETAIL, ("timestep", "segment_id", "synapse_id", "prev_perm", "new_perm", "event")),
+    "tm_phase_trace": (
+        DETAIL, ("timestep", "phase", "event", "cell", "segment", "info")),
+    "tm_phase3_prediction_trace": (
+        DETAIL, ("timestep", "predictive_cell", "column")),
+    "tm_phase3_prediction_accuracy_detailed": (
+        DETAIL, ("timestep", "predicted_column", "is_correct")),
+    "tm_segment_growth_trace": (
+        SUMMARY, ("timestep", "total_segments", "total_synapses", "avg_permanence")),
+    "sp_active_columns_trace": (
+        SUMMARY, ("timestep", "num_active_columns")),
+}
+
+
+class Tracer:
+    """
+    Interface for trace sinks.
+
+    Instrumented code asks `enabled(event)` once per call site and only builds
+    records when it returns True, so a disabled tracer costs one method call
+    per site rather than one per record.
+    """
+
+    def enabled(self, event):
+        """
+        Args:
+            event (str): Event name from `EVENTS`.
+
+        Returns:
+            bool: Whether records for `event` should be emitted.
+        """
+        raise NotImplementedError
+
+    def emit(self, event, row):
+        """
+        Record one row for an event.
+
+        Args:
+            event (str): Event name.
+            row (tuple): Field values in the event's header order.
+        """
+        self.emit_rows(event, [row])
+
+    def emit_rows(self, event, rows):
+        """
+        Record many rows for an event at once.
+
+        Args:
+            event (str): Event name.
+            rows (iterable of tuple): Field values in the event's header order.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Block until every emitted record has been written."""
+
+    def close(self):
+        """Flush and release any resources held by the sink."""
+
+
+class NullTracer(Tracer):
+    """Default tracer: every event is disabled and nothing is recorded."""
+
+    def enabled(self, event):
+        return False
+
+    def emit_rows(self, event, rows):
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+def _format_field(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    return str(value)
+
+
+class CSVTracer(Tracer):
+    """
+    Buffers records in memory and appends them to one CSV file per event from
+    a background writer thread. The thread starts with the first hand-off, so
+    tracers that never record anything cost no thread.
+
+    Tracers sharing a directory append to the same files unless each gets its
+    own `prefix`.
+
+    Args:
+        directory (str): Output directory for the CSV files.
+        level (int): Minimum event level to record (`DETAIL` or `SUMMARY`).
+        events (iterable of str): If given, only these events are recorded.
+        batch_size (int): Buffered rows that trigger a hand-off to the writer.
+        prefix (str): Prepended to every file name, e.g. a model name.
+    """
+
+    def __init__(self, directory="results", level=SUMMARY, events=None, batch_size=10000, prefix=""):
+        unknown = set(events or ()) - set(EVENTS)
+        if unknown:
+            raise ValueError(f"Unknown trace events: {sorted(unknown)}")
+
+        self.directory = directory
+        self.prefix = prefix
+        self.level = level
+        self.batch_size = batch_size
+        self._enabled = {
+            name: event_level >= level and (events is None or name in events)
+            for name, (event_level, _) in EVENTS.items()
+        }
+
+        self._buffers = {}
+        self._num_buffered = 0
+        self._files = {}
+        self._queue = queue.Queue()
+        self._writer = None
+        self._closed = False
+
+    def enabled(self, event):
+        return self._enabled.get(event, False)
+
+    def emit_rows(self, event, rows):
+        buffer = self._buffers.setdefault(event, [])
+        before = len(buffer)
+        buffer.extend(rows)
+        self._num_buffered += len(buffer) - before
+        if self._num_buffered >= self.batch_size:
+            self._hand_off()
+
+    def flush(self):
+        if self._closed:
+            return
+        self._hand_off()
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._writer is not None:
+            atexit.unregister(self.close)
+            self._queue.put(None)
+            self._writer.join()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _hand_off(self):
+        if self._num_buffered:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="CSVTracer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+            self._queue.put(self._buffers)
+            self._buffers = {}
+            self._num_buffered = 0
+
+    def _write_loop(self):
+        while True:
+            buffers = self._queue.get()
+            try:
+                if buffers is None:
+                    return
+                for event, rows in buffers.items():
+                    self._file_for(event).writelines(
+                        ",".join(map(_format_field, row)) + "\n" for row in rows
+                    )
+                for f in self._files.values():
+                    f.flush()
+            finally:
+                self._queue.task_done()
+
+    def _file_for(self, event):
+        f = self._files.get(event)
+        if f is None:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{self.prefix}{event}.csv")
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            f = open(path, "a")
+            if write_header:
+                f.write(",".join(EVENTS[event][1]) + "\n")
+            self._files[event] = f
+        return f
+
+
+def tracer_from_config(trace_cfg):
+    """
+    Build a tracer from the optional "trace" section of a model config.
+
+    Args:
+        trace_cfg (dict or None): Keys `directory`, `level` ("detail" or
+            "summary"), `events`, `batch_size` and `prefix`; all optional.
+
+    Returns:
+        Tracer: `NULL_TRACER` when the section is missing or disabled.
+    """
+    if not trace_cfg or not trace_cfg.get("enabled", True):
+        return NULL_TRACER
+    level = trace_cfg.get("level", SUMMARY)
+    if isinstance(level, str):
+        level = {"detail": DETAIL, "summary": SUMMARY}[level.lower()]
+    return CSVTracer(
+        directory=trace_cfg.get("directory", "results"),
+        level=level,
+        events=trace_cfg.get("events"),
+        batch_size=trace_cfg.get("batch_size", 10000),
+        prefix=trace_cfg.get("prefix", ""),
+    )
+
+
+def stream_config(config, stream):
+    """
+    Copy a model config for one stream of a multi-model runner, prefixing
+    its trace files with the stream name so that models do not append to
+    each other's CSVs.
+
+    Args:
+        config (dict): Model config.
+        stream (str): Stream name.
+
+    Returns:
+        dict: Deep copy of `config`.
+    """
+    config = copy.deepcopy(config)
+    if config.get("trace"):
+        safe_name = re.sub(r"[^\w.-]", "_", str(stream))
+        config["trace"]["prefix"] = config["trace"].get("prefix", "") + f"{safe_name}."
+    return config
@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+from htm_py.cell_state import CellSet, as_cell_array
+
+
+class TestCellSet(unittest.TestCase):
+    def test_set_operations(self):
+        cells = CellSet(10, [3, 1])
+        cells.add(3)
+        cells.add(7)
+        cells.update([1, 8, 8])
+
+        self.assertEqual(len(cells), 4)
+        self.assertEqual(set(cells), {1, 3, 7, 8})
+        self.assertIn(7, cells)
+        self.assertNotIn(2, cells)
+        self.assertEqual(cells.mask[np.array([1, 2, 3])].tolist(), [True, False, True])
+        np.testing.assert_array_equal(np.sort(as_cell_array(cells)), [1, 3, 7, 8])
+
+    def test_clear_resets_mask(self):
+        cells = CellSet(5, [0, 4])
+        cells.clear()
+
+        self.assertEqual(len(cells), 0)
+        self.assertFalse(cells.mask.any())
+        cells.add(2)
+        self.assertEqual(set(cells), {2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,338 @@
+import os
+import unittest
+import numpy as np
+from htm_py.connections import Connections, _SlotLists, _swap_remove
+
+
+class TestConnectionsStorage(unittest.TestCase):
+    def setUp(self):
+        self.connections = Connections(synapse_capacity=4)
+
+    def test_synapse_fields_stored_in_typed_arrays(self):
+        segment = self.connections.create_segment(3)
+        synapse = self.connections.create_synapse(segment, 7, 0.3)
+
+        self.assertEqual(self.connections._presynaptic_cells.dtype, np.int32)
+        self.assertEqual(self.connections._permanences.dtype, np.float32)
+        self.assertEqual(self.connections._synapse_segments[synapse], segment)
+
+        presynaptic_cell, permanence = self.connections.synapse_data_for(synapse)
+        self.assertEqual(presynaptic_cell, 7)
+        self.assertAlmostEqual(permanence, 0.3, places=6)
+
+    def test_storage_grows_past_initial_capacity(self):
+        segment = self.connections.create_segment(0)
+        synapses = [self.connections.create_synapse(segment, cell, 0.5) for cell in range(10)]
+
+        self.assertEqual(len(self.connections.synapse_data), 10)
+        self.assertGreaterEqual(len(self.connections._permanences), 10)
+        for cell, synapse in enumerate(synapses):
+            self.assertEqual(self.connections.synapse_data_for(synapse)[0], cell)
+
+    def test_destroyed_synapse_slots_are_reused(self):
+        segment = self.connections.create_segment(0)
+        synapses = [self.connections.create_synapse(segment, cell, 0.5) for cell in range(3)]
+
+        self.connections.destroy_synapse(synapses[1])
+        self.assertNotIn(synapses[1], self.connections.synapse_data)
+        self.assertEqual(self.connections.synapses_for_segment(segment), [synapses[0], synapses[2]])
+
+        reused = self.connections.create_synapse(segment, 9, 0.4)
+        self.assertEqual(reused, synapses[1])
+        self.assertEqual(self.connections.synapse_data_for(reused)[0], 9)
+        self.assertEqual(len(self.connections.synapse_data), 3)
+
+    def test_synapse_data_for_missing_synapse_raises(self):
+        with self.assertRaises(KeyError):
+            self.connections.synapse_data_for(0)
+
+    def test_synapses_on_missing_segment_raise(self):
+        segment = self.connections.create_segment(0)
+        self.connections.destroy_segment(segment)
+        with self.assertRaises(KeyError):
+            self.connections.create_synapse(segment, 1, 0.5)
+        with self.assertRaises(KeyError):
+            self.connections.grow_synapses_batch([segment + 1], [1, 2], 0.5, 2)
+
+    def test_indexes_stay_consistent_under_churn(self):
+        rng = np.random.default_rng(2)
+        connections = Connections(rng=np.random.RandomState(2))
+        segments = [connections.create_segment(cell) for cell in range(30)]
+        for step in range(300):
+            action = rng.integers(4)
+            if action == 0:
+                connections.create_synapse(int(rng.choice(segments)), int(rng.integers(40)), 0.5)
+            elif action == 1:
+                connections.grow_synapses_batch(
+                    rng.choice(segments, size=5, replace=False).tolist(), rng.integers(40, size=10), 0.5, 4)
+            elif action == 2 and len(connections.synapse_data):
+                connections.destroy_synapse(int(rng.choice(list(connections.synapse_data))))
+            else:
+                segment = int(rng.choice(segments))
+                connections.destroy_segment(segment)
+                segments[segments.index(segment)] = connections.create_segment(int(rng.integers(30)))
+            if step == 150:
+                connections.garbage_collect(0.0)
+                segments = connections.segments()
+                segments += [connections.create_segment(cell) for cell in range(30 - len(segments))]
+
+        self.assertIsInstance(connections.segment_to_synapses[segments[0]], list)
+        live = np.flatnonzero(connections._synapse_segments[:connections._num_synapse_slots] >= 0)
+        for segment in connections.segments():
+            synapses = connections.synapses_for_segment(segment)
+            self.assertEqual(sorted(synapses), live[connections._synapse_segments[live] == segment].tolist())
+            self.assertEqual([connections._synapse_positions[s] for s in synapses], list(range(len(synapses))))
+        for cell in range(40):
+            synapses = connections.synapses_for_presynaptic_cell(cell)
+            self.assertEqual(sorted(synapses), live[connections._presynaptic_cells[live] == cell].tolist())
+            self.assertEqual([connections._presynaptic_positions[s] for s in synapses], list(range(len(synapses))))
+
+
+class TestSlotLists(unittest.TestCase):
+    def test_matches_python_lists_across_moves_and_repacks(self):
+        rng = np.random.default_rng(4)
+        lists, expected = _SlotLists(), {}
+        positions = np.zeros(3000, dtype=np.int32)
+        reference_positions = np.zeros(3000, dtype=np.int32)
+        next_value = 0
+        for _ in range(400):
+            if rng.random() < 0.3:
+                key = int(rng.choice(list(expected)))
+                if expected[key]:
+                    position = int(rng.integers(len(expected[key])))
+                    lists.remove(key, position, positions)
+                    _swap_remove(expected[key], position, reference_positions)
+                continue
+            keys = rng.integers(60, size=int(rng.integers(1, 8)))
+            values = np.arange(next_value, next_value + len(keys))
+            next_value += len(keys)
+            if len(keys) == 1:
+                positions[values[0]] = lists.append_one(int(keys[0]), int(values[0]))
+            else:
+                positions[values] = lists.append(keys, values)
+            for key, value in zip(keys.tolist(), values.tolist()):
+                expected.setdefault(key, []).append(value)
+
+        for key, values in expected.items():
+            self.assertEqual(lists.get(key).tolist(), values)
+            np.testing.assert_array_equal(positions[values], np.arange(len(values)))
+        self.assertEqual(lists.gather(np.array([3, 999, 5])).tolist(), expected.get(3, []) + expected.get(5, []))
+
+
+class TestConnectionsActivity(unittest.TestCase):
+    def setUp(self):
+        self.connections = Connections()
+
+    def test_compute_activity_matches_per_segment_counts(self):
+        rng = np.random.default_rng(0)
+        for cell in range(20):
+            segment = self.connections.create_segment(cell)
+            for presynaptic_cell in rng.choice(50, size=8, replace=False):
+                self.connections.create_synapse(segment, int(presynaptic_cell), float(rng.uniform(0.0, 1.0)))
+
+        active_cells = set(rng.choice(50, size=15, replace=False).tolist())
+        num_connected, num_potential = self.connections.compute_activity(active_cells, 0.5)
+
+        for segment in self.connections.segments():
+            self.assertEqual(
+                num_connected[segment],
+                self.connections.num_active_connected_synapses(segment, active_cells, 0.5))
+            self.assertEqual(
+                num_potential[segment],
+                self.connections.num_active_potential_synapses(segment, active_cells))
+
+    def test_reverse_index_tracks_destroyed_synapses(self):
+        segment = self.connections.create_segment(0)
+        synapse = self.connections.create_synapse(segment, 5, 0.6)
+        self.assertEqual(self.connections.synapses_for_presynaptic_cell(5), [synapse])
+
+        self.connections.destroy_synapse(synapse)
+        self.assertEqual(self.connections.synapses_for_presynaptic_cell(5), [])
+
+        num_connected, num_potential = self.connections.compute_activity({5}, 0.5)
+        self.assertEqual(num_connected[segment], 0)
+        self.assertEqual(num_potential[segment], 0)
+
+
+class TestConnectionsOwnership(unittest.TestCase):
+    def setUp(self):
+        self.connections = Connections(synapse_capacity=2, segment_capacity=2)
+
+    def test_owner_lookups(self):
+        segments = [self.connections.create_segment(cell) for cell in (4, 7, 4)]
+        synapse = self.connections.create_synapse(segments[1], 0, 0.5)
+
+        self.assertEqual(self.connections.cell_for_segment(segments[1]), 7)
+        self.assertEqual(self.connections.cells_for_segments(segments).tolist(), [4, 7, 4])
+        self.assertEqual(self.connections.segment_for_synapse(synapse), segments[1])
+
+    def test_destroy_segment_keeps_owner_maps_consistent(self):
+        first = self.connections.create_segment(3)
+        second = self.connections.create_segment(3)
+        third = self.connections.create_segment(3)
+        for segment in (first, second, third):
+            for presynaptic_cell in range(3):
+                self.connections.create_synapse(segment, presynaptic_cell, 0.5)
+
+        self.connections.destroy_segment(first)
+        self.assertEqual(sorted(self.connections.segments_for_cell(3)), [second, third])
+        with self.assertRaises(ValueError):
+            self.connections.cell_for_segment(first)
+        for presynaptic_cell in range(3):
+            owners = {
+                self.connections.segment_for_synapse(synapse)
+                for synapse in self.connections.synapses_for_presynaptic_cell(presynaptic_cell)
+            }
+            self.assertEqual(owners, {second, third})
+
+        # Removing from the middle of a list must leave the swapped entry removable
+        self.connections.destroy_segment(third)
+        self.connections.destroy_segment(second)
+        self.assertEqual(self.connections.segments_for_cell(3), [])
+        self.assertEqual(len(self.connections.synapse_data), 0)
+
+    def test_destroyed_segment_ids_are_reused(self):
+        segment = self.connections.create_segment(1)
+        self.connections.destroy_segment(segment)
+
+        reused = self.connections.create_segment(2)
+        self.assertEqual(reused, segment)
+        self.assertEqual(self.connections.cell_for_segment(reused), 2)
+        self.assertEqual(self.connections.synapses_for_segment(reused), [])
+
+
+class TestConnectionsBatchLearning(unittest.TestCase):
+    def setUp(self):
+        os.makedirs("results", exist_ok=True)
+        self.connections = Connections()
+
+    def test_adapt_segments_matches_adapt_segment(self):
+        batched = Connections()
+        for connections in (self.connections, batched):
+            for cell in range(3):
+                segment = connections.create_segment(cell)
+                for presynaptic_cell in range(6):
+                    connections.create_synapse(segment, presynaptic_cell, 0.1 * (presynaptic_cell + 1))
+
+        prev_active_cells = {0, 2, 4}
+        for segment in self.connections.segments():
+            self.connections.adapt_segment(segment, prev_active_cells, 0.05, 0.02)
+        batched.adapt_segments(batched.segments(), prev_active_cells, 0.05, 0.02)
+
+        np.testing.assert_array_equal(self.connections.permanences(), batched.permanences())
+
+    def test_grow_synapses_batch_skips_existing_presynaptic_cells(self):
+        first = self.connections.create_segment(0)
+        second = self.connections.create_segment(1)
+        for presynaptic_cell in (1, 2, 3):
+            self.connections.create_synapse(first, presynaptic_cell, 0.5)
+
+        self.connections.grow_synapses_batch([first, second], {1, 2, 3, 4, 5}, 0.21, 4)
+
+        first_cells = [self.connections.synapse_data_for(s)[0] for s in self.connections.synapses_for_segment(first)]
+        second_cells = [self.connections.synapse_data_for(s)[0] for s in self.connections.synapses_for_segment(second)]
+        self.assertEqual(sorted(first_cells), [1, 2, 3, 4, 5])
+        self.assertEqual(len(second_cells), 4)
+        self.assertEqual(len(set(second_cells)), 4)
+        self.assertTrue(set(second_cells) <= {1, 2, 3, 4, 5})
+        for synapse in self.connections.synapses_for_segment(second):
+            self.assertAlmostEqual(self.connections.synapse_data_for(synapse)[1], 0.21, places=6)
+
+
+class TestConnectionsGarbageCollection(unittest.TestCase):
+    def setUp(self):
+        self.connections = Connections()
+
+    def test_gc_removes_dead_synapses_and_empty_segments(self):
+        dead = self.connections.create_segment(0)
+        self.connections.create_synapse(dead, 1, 0.0)
+        empty = self.connections.create_segment(0)
+        live = self.connections.create_segment(2)
+        kept = [self.connections.create_synapse(live, cell, perm) for cell, perm in ((3, 0.5), (4, 0.0), (5, 0.3))]
+
+        segment_map, synapse_map = self.connections.garbage_collect(permanence_floor=0.0)
+
+        self.assertEqual(segment_map[dead], -1)
+        self.assertEqual(segment_map[empty], -1)
+        self.assertEqual(segment_map[live], 0)
+        self.assertEqual(synapse_map[kept[1]], -1)
+
+        self.assertEqual(self.connections.segments(), [0])
+        self.assertEqual(self.connections.segments_for_cell(0), [])
+        self.assertEqual(self.connections.cell_for_segment(0), 2)
+        self.assertEqual(len(self.connections.synapse_data), 2)
+        self.assertEqual(len(self.connections._permanences), 2)
+        self.assertEqual(
+            [self.connections.synapse_data_for(s)[0] for s in self.connections.synapses_for_segment(0)],
+            [3, 5])
+
+    def test_compacted_storage_stays_consistent(self):
+        rng = np.random.default_rng(1)
+        for cell in range(30):
+            segment = self.connections.create_segment(cell % 7)
+            for presynaptic_cell in rng.choice(40, size=6, replace=False):
+                self.connections.create_synapse(segment, int(presynaptic_cell), float(rng.choice([0.0, 0.2, 0.6])))
+        self.connections.destroy_segment(3)
+
+        active_cells = set(range(0, 40, 3))
+        before = {}
+        for segment in self.connections.segments():
+            cells = [self.connections.synapse_data_for(s)[0] for s in self.connections.synapses_for_segment(segment)
+                     if self.connections.synapse_data_for(s)[1] > 0.0]
+            if cells:
+                before[segment] = cells
+
+        segment_map, _ = self.connections.garbage_collect()
+        self.assertEqual(sorted(self.connections.segments()), list(range(len(before))))
+
+        num_connected, num_potential = self.connections.compute_activity(active_cells, 0.5)
+        for old, cells in before.items():
+            new = int(segment_map[old])
+            self.assertEqual(
+                [self.connections.synapse_data_for(s)[0] for s in self.connections.synapses_for_segment(new)], cells)
+            self.assertEqual(num_potential[new], self.connections.num_active_potential_synapses(new, active_cells))
+            self.assertEqual(num_connected[new], self.connections.num_active_connected_synapses(new, active_cells, 0.5))
+            self.assertIn(new, self.connections.segments_for_cell(self.connections.cell_for_segment(new)))
+
+        # Storage keeps working after compaction
+        segment = self.connections.create_segment(9)
+        synapse = self.connections.create_synapse(segment, 1, 0.4)
+        self.connections.destroy_synapse(synapse)
+        self.connections.destroy_segment(segment)
+
+
+class TestConnectionsStats(unittest.TestCase):
+    def test_stats_track_create_adapt_destroy_and_gc(self):
+        os.makedirs("results", exist_ok=True)
+        connections = Connections(synapse_capacity=8)
+
+        def check():
+            permanences = connections.permanences().astype(np.float64)
+            stats = connections.stats()
+            self.assertEqual(stats["num_segments"], len(connections.segments()))
+            self.assertEqual(stats["num_synapses"], len(permanences))
+            self.assertAlmostEqual(stats["permanence_sum"], permanences.sum(), places=4)
+
+        for cell in range(10):
+            segment = connections.create_segment(cell)
+            connections.grow_synapses(segment, set(range(20)), 0.21, 5)
+            connections.create_synapse(segment, 30 + cell, 0.05)
+        check()
+
+        connections.adapt_segments(connections.segments(), set(range(0, 20, 2)), 0.1, 0.03)
+        check()
+
+        connections.destroy_segment(4)
+        connections.destroy_synapse(connections.synapses_for_segment(2)[0])
+        check()
+
+        for _ in range(3):
+            connections.adapt_segments(connections.segments(), set(), 0.0, 0.1)
+        connections.garbage_collect()
+        check()
+
+        self.assertEqual(Connections().stats()["avg_permanence"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
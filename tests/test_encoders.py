@@ -0,0 +1,154 @@
+import unittest
+import numpy as np
+from datetime import datetime
+from htm_py.encoders.date import DateEncoder
+from htm_py.encoders.rdse import RDSE, RandomDistributedScalarEncoder
+
+
+def legacy_rdse_bits(rdse, value):
+    center_bucket = min(int((value - rdse.min_val) / rdse.resolution), rdse.num_buckets - 1)
+    bits = np.zeros(rdse.n, dtype=np.uint8)
+    for i in range(-(rdse.w // 2), rdse.w // 2 + 1):
+        bits[(center_bucket + i) % rdse.n] = 1
+    return bits
+
+
+class TestRDSE(unittest.TestCase):
+    def setUp(self):
+        self.rdse = RDSE(min_val=0, max_val=100, resolution=0.88, w=21, cache_size=8)
+        self.values = np.random.default_rng(2).uniform(0, 100, size=200)
+
+    def test_encoding_matches_bucket_window(self):
+        for value in list(self.values[:20]) + [0, 100]:
+            np.testing.assert_array_equal(self.rdse.encode(value).dense, legacy_rdse_bits(self.rdse, value))
+
+    def test_bucket_cache_is_bounded(self):
+        for value in self.values:
+            self.rdse.encode(value)
+        self.assertLessEqual(len(self.rdse._bucket_cache), 8)
+
+        first = self.rdse.encode(50.0)
+        second = self.rdse.encode(50.0)
+        self.assertIs(first.sparse, second.sparse)
+        self.assertIsNot(first, second)
+
+    def test_encode_batch_matches_encode(self):
+        dense = self.rdse.encode_batch(self.values)
+        sparse = self.rdse.encode_batch(self.values, sparse=True)
+
+        self.assertEqual(dense.shape, (200, self.rdse.n))
+        self.assertEqual(sparse.shape, (200, 21))
+        for value, dense_row, sparse_row in zip(self.values, dense, sparse):
+            encoded = self.rdse.encode(value)
+            np.testing.assert_array_equal(dense_row, encoded.dense)
+            np.testing.assert_array_equal(sparse_row, encoded.sparse)
+
+    def test_encode_batch_rejects_out_of_range_values(self):
+        with self.assertRaises(ValueError):
+            self.rdse.encode_batch([5.0, 101.0])
+
+    def test_encode_into_matches_encode(self):
+        out = np.ones(self.rdse.n, dtype=np.uint8)
+        for value in list(self.values[:20]) + [0, 100]:
+            self.rdse.encode_into(value, out)
+            np.testing.assert_array_equal(out, self.rdse.encode(value).dense)
+        for value in (-0.5, 100.5, float("nan")):
+            with self.assertRaises(ValueError):
+                self.rdse.encode_into(value, out)
+
+
+class TestDateEncoder(unittest.TestCase):
+    def setUp(self):
+        self.encoder = DateEncoder(timeOfDay=(21, 9.49))
+        self.strings = [f"2014-04-01 {hour:02d}:{minute:02d}:00" for hour in range(24) for minute in (0, 17, 59)]
+
+    def test_encoding_matches_bucket_window(self):
+        encoded = self.encoder.encode("2014-04-01 23:59:00")
+        bucket = int((23 + 59 / 60.0) / 24.0 * 21)
+        np.testing.assert_array_equal(encoded.sparse, np.sort((bucket - 4 + np.arange(9)) % 21))
+
+    def test_encode_batch_matches_encode(self):
+        expected = np.array([self.encoder.encode(s).dense for s in self.strings])
+
+        np.testing.assert_array_equal(self.encoder.encode_batch(self.strings), expected)
+        np.testing.assert_array_equal(
+            self.encoder.encode_batch(np.array(self.strings, dtype="datetime64[s]")), expected)
+        np.testing.assert_array_equal(
+            self.encoder.encode_batch([datetime.strptime(s, "%Y-%m-%d %H:%M:%S") for s in self.strings]),
+            expected)
+        sparse = self.encoder.encode_batch(self.strings, sparse=True)
+        for row, s in zip(sparse, self.strings):
+            np.testing.assert_array_equal(row, self.encoder.encode(s).sparse)
+
+    def test_custom_format_strings_fall_back_to_strptime(self):
+        encoder = DateEncoder(timeOfDay=(21, 9.49), strptime_str="%d/%m/%Y %H:%M")
+        np.testing.assert_array_equal(
+            encoder.encode_batch(["01/04/2014 13:30"]),
+            self.encoder.encode_batch(["2014-04-01 13:30:00"]))
+
+    def test_datetime64_scalar(self):
+        self.assertEqual(
+            self.encoder.encode(np.datetime64("2014-04-01T18:45")), self.encoder.encode("2014-04-01 18:45:00"))
+
+    def test_encode_into_matches_encode(self):
+        out = np.ones(21, dtype=np.uint8)
+        for s in self.strings:
+            for timestamp in (s, np.datetime64(s.replace(" ", "T"))):
+                self.encoder.encode_into(timestamp, out)
+                np.testing.assert_array_equal(out, self.encoder.encode(s).dense)
+
+
+class TestRandomDistributedScalarEncoder(unittest.TestCase):
+    def setUp(self):
+        self.encoder = RandomDistributedScalarEncoder(n=400, w=21, resolution=1.0, seed=7, cache_size=16)
+
+    def test_width_is_fixed_and_range_is_unbounded(self):
+        for value in (-1e9, -3.5, 0.0, 12.0, 1e15):
+            sdr = self.encoder.encode(value)
+            self.assertEqual(sdr.size, 400)
+            self.assertEqual(sdr.num_active, 21)
+        with self.assertRaises(ValueError):
+            self.encoder.encode(float("nan"))
+
+    def test_collisions_are_rehashed(self):
+        # With n this close to w most buckets hash some bit twice
+        encoder = RandomDistributedScalarEncoder(n=130, w=21, resolution=0.88, seed=42)
+        values = np.concatenate([np.linspace(-5, 200, 300), [1e12, -5.0]])
+        for value in values:
+            self.assertEqual(encoder.encode(value).num_active, 21)
+        with self.assertRaises(ValueError):
+            RandomDistributedScalarEncoder(n=20, w=21)
+
+    def test_nearby_values_overlap_and_distant_values_do_not(self):
+        base = self.encoder.encode(100.0)
+        self.assertEqual(base.overlap(self.encoder.encode(100.5)), base.num_active)
+        self.assertGreaterEqual(base.overlap(self.encoder.encode(101.0)), 18)
+        self.assertLess(base.overlap(self.encoder.encode(500.0)), 8)
+
+    def test_seed_selects_the_bit_mapping(self):
+        same = RandomDistributedScalarEncoder(n=400, w=21, resolution=1.0, seed=7)
+        other = RandomDistributedScalarEncoder(n=400, w=21, resolution=1.0, seed=8)
+
+        self.assertEqual(same.encode(42.0), self.encoder.encode(42.0))
+        self.assertLess(other.encode(42.0).overlap(self.encoder.encode(42.0)), 8)
+
+    def test_encode_batch_matches_encode(self):
+        values = np.random.default_rng(3).normal(0, 1000, size=100)
+        dense = self.encoder.encode_batch(values)
+        for value, row in zip(values, dense):
+            np.testing.assert_array_equal(row, self.encoder.encode(value).dense)
+        self.assertLessEqual(len(self.encoder._bucket_cache), 16)
+
+        out = np.ones(400, dtype=np.uint8)
+        for value in list(values[:10]) + [-1e9, 1e15, float("inf")]:
+            self.encoder.encode_into(value, out)
+            np.testing.assert_array_equal(out, self.encoder.encode_batch([value])[0])
+
+        encoder = RandomDistributedScalarEncoder(n=130, w=21, resolution=0.88, seed=42)
+        sparse = encoder.encode_batch(values, sparse=True)
+        for value, row in zip(values, sparse):
+            np.testing.assert_array_equal(row, encoder.encode(value).sparse)
+
+
+if __name__ == '__main__':
+    unittest.main()
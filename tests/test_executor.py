@@ -0,0 +1,75 @@
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+from htm_py.executor import StreamExecutor
+from htm_py.htm_model import HTMModel
+from tests.test_htm_model import make_config
+
+
+class TestStreamExecutor(unittest.TestCase):
+    def make_stream(self, period):
+        timestamps = pd.date_range("2024-01-01", periods=50, freq="h").strftime("%Y-%m-%d %H:%M:%S")
+        return pd.DataFrame({"timestamp": timestamps, "value": (np.arange(50) % period) * 7.0})
+
+    def test_streams_match_independent_models(self):
+        streams = {f"metric-{period}": self.make_stream(period) for period in (3, 5, 7, 11)}
+
+        with StreamExecutor(make_config(), num_workers=2, batch_size=8) as executor:
+            results = executor.run(streams)
+
+        self.assertEqual(set(results), set(streams))
+        for name, df in streams.items():
+            expected_scores, expected_counts = HTMModel(make_config()).run(df)
+            np.testing.assert_array_equal(results[name][0], expected_scores)
+            np.testing.assert_array_equal(results[name][1], expected_counts)
+
+    def test_submitted_records_keep_stream_order(self):
+        records = self.make_stream(4).to_dict("records")
+        expected_scores, _ = HTMModel(make_config()).run(records)
+
+        with StreamExecutor(make_config(), num_workers=2, batch_size=6) as executor:
+            for start in range(0, len(records), 10):
+                executor.submit("a", records[start:start + 10])
+                executor.submit("b", records[start:start + 10])
+            scores = {"a": [], "b": []}
+            for stream, anomaly_scores, _ in executor.results():
+                scores[stream].append(anomaly_scores)
+
+        for stream in ("a", "b"):
+            np.testing.assert_array_equal(np.concatenate(scores[stream]), expected_scores)
+
+    def test_switching_learn_keeps_stream_order(self):
+        records = self.make_stream(4).to_dict("records")
+        segments = [(records[:20], True), (records[20:25], False), (records[25:], True)]
+        model = HTMModel(make_config())
+        expected_scores = np.concatenate([model.run(chunk, learn=learn)[0] for chunk, learn in segments])
+
+        with StreamExecutor(make_config(), num_workers=1, batch_size=64) as executor:
+            for chunk, learn in segments:
+                executor.submit("a", chunk, learn=learn)
+            scores = np.concatenate([anomaly_scores for _, anomaly_scores, _ in executor.results()])
+
+        np.testing.assert_array_equal(scores, expected_scores)
+
+    def test_close_returns_with_unread_results(self):
+        records = (self.make_stream(4).to_dict("records") * 8)[:400]
+        executor = StreamExecutor(make_config(), num_workers=1, batch_size=1)
+        executor.submit("a", records)
+
+        # Every batch sends its own result; unread, they fill the result pipe
+        closer = threading.Thread(target=executor.close, daemon=True)
+        closer.start()
+        closer.join(timeout=60)
+        self.assertFalse(closer.is_alive())
+        self.assertFalse(any(worker.is_alive() for worker in executor._workers))
+
+    def test_worker_errors_are_raised(self):
+        with StreamExecutor(make_config(), num_workers=1) as executor:
+            executor.submit("broken", [{"value": 1.0}])
+            with self.assertRaises(RuntimeError):
+                list(executor.results())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+import pandas as pd
+from htm_py.encoders.rdse import RDSE, RandomDistributedScalarEncoder
+from htm_py.htm_model import HTMModel
+
+
+def make_config():
+    return {
+        "encoder": {
+            "rdse_features": [{"name": "value", "min_val": 0, "max_val": 100, "n": 60, "w": 7, "encoder": "hashed", "seed": 3}],
+            "timeOfDay": {"n": 21, "rotation": 5},
+        },
+        "use_sp": True,
+        "sp": {"columnCount": 128, "numActiveColumnsPerInhArea": 8, "seed": 5},
+        "tm": {
+            "column_dimensions": [128],
+            "cells_per_column": 4,
+            "activation_threshold": 3,
+            "initial_permanence": 0.21,
+            "connected_permanence": 0.2,
+            "min_threshold": 2,
+            "max_new_synapse_count": 6,
+            "permanence_increment": 0.1,
+            "permanence_decrement": 0.05,
+            "predicted_segment_decrement": 0.01,
+            "seed": 7,
+        },
+    }
+
+
+class TestHTMModelRun(unittest.TestCase):
+    def setUp(self):
+        timestamps = pd.date_range("2024-01-01", periods=60, freq="h").strftime("%Y-%m-%d %H:%M:%S")
+        self.df = pd.DataFrame({"timestamp": timestamps, "value": (np.arange(60) % 12) * 8.0})
+
+    def compute_loop(self, df, learn=True):
+        model = HTMModel(make_config())
+        return model, np.array([
+            model.compute({"timestamp": t, "value": v}, learn=learn) for t, v in zip(df.timestamp, df.value)
+        ])
+
+    def test_run_matches_compute(self):
+        _, expected = self.compute_loop(self.df)
+
+        anomaly_scores, prediction_counts = HTMModel(make_config()).run(self.df, batch_size=16)
+        np.testing.assert_array_equal(anomaly_scores, expected[:, 0])
+        np.testing.assert_array_equal(prediction_counts, expected[:, 1])
+
+        records = HTMModel(make_config()).run(self.df.to_records(index=False))
+        np.testing.assert_array_equal(records[0], expected[:, 0])
+
+    def test_run_matches_compute_with_timezone_aware_timestamps(self):
+        df = self.df.assign(timestamp=pd.date_range("2024-03-09", periods=60, freq="h", tz="US/Eastern"))
+        _, expected = self.compute_loop(df)
+
+        anomaly_scores, prediction_counts = HTMModel(make_config()).run(df, batch_size=16)
+        np.testing.assert_array_equal(anomaly_scores, expected[:, 0])
+        np.testing.assert_array_equal(prediction_counts, expected[:, 1])
+
+        anomaly_scores, _ = HTMModel(make_config()).run(df.to_dict("records"), batch_size=16)
+        np.testing.assert_array_equal(anomaly_scores, expected[:, 0])
+
+    def test_stream_accepts_records(self):
+        _, expected = self.compute_loop(self.df)
+
+        streamed = list(HTMModel(make_config()).stream(self.df.to_dict("records"), batch_size=7))
+        np.testing.assert_array_equal(np.array(streamed), expected)
+
+    def test_run_fills_preallocated_arrays(self):
+        out = (np.full(100, np.nan), np.full(100, np.nan))
+
+        anomaly_scores, _ = HTMModel(make_config()).run(self.df, out=out)
+
+        self.assertEqual(len(anomaly_scores), 60)
+        self.assertTrue(np.shares_memory(anomaly_scores, out[0]))
+        self.assertFalse(np.isnan(out[0][:60]).any())
+        with self.assertRaises(ValueError):
+            HTMModel(make_config()).run(self.df, out=(np.empty(10), np.empty(10)))
+
+    def test_inference_run_matches_compute(self):
+        model, _ = self.compute_loop(self.df[:40])
+        expected = [model.compute({"timestamp": t, "value": v}, learn=False)
+                    for t, v in zip(self.df.timestamp[40:], self.df.value[40:])]
+
+        model, _ = self.compute_loop(self.df[:40])
+        anomaly_scores, _ = model.run(self.df[40:], learn=False)
+        np.testing.assert_array_equal(anomaly_scores, np.array(expected)[:, 0])
+
+    def test_missing_feature_is_rejected(self):
+        with self.assertRaises(ValueError):
+            HTMModel(make_config()).run([{"value": 1.0}])
+
+    def test_encoder_key_selects_the_scalar_encoder(self):
+        config = make_config()
+        self.assertIsInstance(HTMModel(config).encoder.encoders["value"], RandomDistributedScalarEncoder)
+
+        # A seed alone keeps the bounded encoder
+        del config["encoder"]["rdse_features"][0]["encoder"]
+        encoder = HTMModel(config).encoder.encoders["value"]
+        self.assertIs(type(encoder), RDSE)
+
+        config["encoder"]["rdse_features"][0]["encoder"] = "random"
+        with self.assertRaises(ValueError):
+            HTMModel(config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,17 @@ import os
 import unittest
 import pandas as pd
 from htm_py.temporal_memory import TemporalMemory
+from htm_py.tracing import CSVTracer, DETAIL
 
 class TestPhase1Activation(unittest.TestCase):
     def setUp(self):
+        # Initialize debug log ONCE here
+        os.makedirs("results", exist_ok=True)
+        debug_log_path = "results/segment_adapt_debug.csv"
+        with open(debug_log_path, "w") as f:
+            f.write("timestep,segment_id,synapse_id,prev_perm,new_perm,event\n")
+
+        self.tracer = CSVTracer("results", level=DETAIL, events=["segment_adapt_debug"])
         self.tm = TemporalMemory(
             column_dimensions=[100],  # Match the test columns
             cells_per_column=4,       # Ensure this is 4!
@@ -16,14 +24,12 @@ class TestPhase1Activation(unittest.TestCase):
             max_new_synapse_count=5,
             permanence_increment=0.1,
             permanence_decrement=0.1,
-            predicted_segment_decrement=0.01
+            predicted_segment_decrement=0.01,
+            tracer=self.tracer
         )
 
-        # Initialize debug log ONCE here
-        os.makedirs("results", exist_ok=True)
-        debug_log_path = "results/segment_adapt_debug.csv"
-        with open(debug_log_path, "w") as f:
-            f.write("timestep,segment_id,synapse_id,prev_perm,new_perm,event\n")
+    def tearDown(self):
+        self.tracer.close()
 
     def test_activate_dendrites_sets_active_segments(self):
         # Simulate some active cells to drive activation
@@ -62,6 +68,7 @@ class TestPhase1Activation(unittest.TestCase):
         self.tm.activate_dendrites(learn=True)
 
         # Confirm adaptation occurred via debug log
+        self.tracer.flush()
         debug_df = pd.read_csv("results/segment_adapt_debug.csv")
         adapted_segments = debug_df["segment_id"].unique()
         self.assertIn(segment_inactive, adapted_segments, 
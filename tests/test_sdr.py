@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+from htm_py.sdr import SDR
+from htm_py.encoders.multi import MultiEncoder
+from htm_py.encoders.rdse import RDSE
+from htm_py.encoders.date import DateEncoder
+
+
+class TestSDR(unittest.TestCase):
+    def test_views_are_derived_from_either_representation(self):
+        dense = np.zeros(20, dtype=np.int64)
+        dense[[2, 9, 17]] = 1
+
+        from_dense = SDR(20, dense=dense)
+        from_sparse = SDR(20, sparse=[2, 9, 17])
+
+        np.testing.assert_array_equal(from_dense.sparse, [2, 9, 17])
+        np.testing.assert_array_equal(from_sparse.dense, dense)
+        np.testing.assert_array_equal(from_sparse.bitset, np.packbits(dense))
+        np.testing.assert_array_equal(np.asarray(from_sparse), dense)
+        self.assertEqual(from_dense, from_sparse)
+        self.assertEqual(from_dense.num_active, 3)
+
+    def test_assignment_reuses_dense_buffer(self):
+        sdr = SDR(10, sparse=[1, 2])
+        buffer = sdr.dense
+
+        sdr.sparse = [5]
+        self.assertIs(sdr.dense, buffer)
+        np.testing.assert_array_equal(np.flatnonzero(buffer), [5])
+
+        sdr.dense = np.eye(10, dtype=np.int64)[7]
+        self.assertIs(sdr.dense, buffer)
+        np.testing.assert_array_equal(sdr.sparse, [7])
+
+        sdr.zero()
+        self.assertEqual(sdr.num_active, 0)
+
+    def test_overlap_and_union(self):
+        a = SDR(30, sparse=[1, 5, 20, 29])
+        b = SDR(30, sparse=[5, 6, 29])
+
+        self.assertEqual(a.overlap(b), 2)
+        np.testing.assert_array_equal(a.union(b).sparse, [1, 5, 6, 20, 29])
+        with self.assertRaises(ValueError):
+            a.overlap(SDR(31))
+
+    def test_out_of_range_indices_are_rejected(self):
+        with self.assertRaises(ValueError):
+            SDR(10, sparse=[10])
+
+    def test_multi_encoder_concatenates_sdrs(self):
+        encoder = MultiEncoder({
+            "value": RDSE(min_val=0, max_val=100, n=50, w=5),
+            "timestamp": DateEncoder(timeOfDay=(24, 3)),
+        })
+
+        sdr = encoder.encode({"value": 0, "timestamp": "2024-01-01 12:00:00"})
+
+        self.assertIsInstance(sdr, SDR)
+        self.assertEqual(sdr.size, 74)
+        np.testing.assert_array_equal(sdr.sparse, [0, 1, 2, 48, 49, 61, 62, 63])
+
+    def test_multi_encoder_reuses_output_buffer(self):
+        encoder = MultiEncoder({
+            "value": RDSE(min_val=0, max_val=100, n=50, w=5),
+            "timestamp": DateEncoder(timeOfDay=(24, 3)),
+        })
+        out = SDR(encoder.output_width)
+        buffer = out.dense
+
+        first = encoder.encode({"value": 0, "timestamp": "2024-01-01 12:00:00"}, out=out)
+        second = encoder.encode({"value": 100, "timestamp": "2024-01-01 00:00:00"}, out=out)
+
+        self.assertIs(first, out)
+        self.assertIs(second.dense, buffer)
+        np.testing.assert_array_equal(
+            second.sparse, encoder.encode({"value": 100, "timestamp": "2024-01-01 00:00:00"}).sparse)
+        np.testing.assert_array_equal(second.sparse, [43, 44, 45, 46, 47, 50, 51, 73])
+
+
+if __name__ == '__main__':
+    unittest.main()
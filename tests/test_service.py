@@ -0,0 +1,148 @@
+import json
+import asyncio
+import functools
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from htm_py.htm_model import HTMModel
+from htm_py.service import AnomalyService, StreamError
+from tests.test_htm_model import make_config
+
+
+def make_records(period, count=40):
+    timestamps = pd.date_range("2024-01-01", periods=count, freq="h").strftime("%Y-%m-%d %H:%M:%S")
+    return [{"timestamp": t, "value": (i % period) * 7.0} for i, t in enumerate(timestamps)]
+
+
+def async_test(method):
+    """Run a coroutine test method in its own event loop."""
+    @functools.wraps(method)
+    def wrapper(self):
+        return asyncio.run(method(self))
+    return wrapper
+
+
+class TestAnomalyService(unittest.TestCase):
+    async def collect(self, service):
+        results = {}
+        async for stream, record, anomaly_score, _ in service.results():
+            results.setdefault(stream, []).append(anomaly_score)
+        return results
+
+    @async_test
+    async def test_streams_match_independent_models(self):
+        streams = {"a": make_records(3), "b": make_records(5)}
+        service = AnomalyService(make_config(), max_queue_size=4, max_batch_size=3)
+        consumer = asyncio.create_task(self.collect(service))
+
+        async def produce(stream, records):
+            for record in records:
+                await service.submit(stream, record)
+
+        await asyncio.gather(*(produce(stream, records) for stream, records in streams.items()))
+        await service.close()
+        results = await consumer
+
+        for stream, records in streams.items():
+            expected, _ = HTMModel(make_config()).run(records)
+            np.testing.assert_array_equal(results[stream], expected)
+
+    @async_test
+    async def test_full_stream_queue_blocks_its_producer(self):
+        release = threading.Event()
+        original_run = HTMModel.run
+
+        def slow_run(model, data, *args, **kwargs):
+            release.wait(5)
+            return original_run(model, data, *args, **kwargs)
+
+        service = AnomalyService(make_config(), max_queue_size=2, max_batch_size=1)
+        consumer = asyncio.create_task(self.collect(service))
+        records = make_records(3, count=6)
+        with mock.patch.object(HTMModel, "run", slow_run):
+            await service.submit("a", records[0])
+            # Let the stream task take the first record into its (blocked) batch
+            while service.pending("a"):
+                await asyncio.sleep(0.01)
+            await service.submit("a", records[1])
+            await service.submit("a", records[2])
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(service.submit("a", records[3]), timeout=0.1)
+            self.assertEqual(service.pending("a"), 2)
+
+            # Other streams are not held back by the blocked one
+            await asyncio.wait_for(service.submit("b", records[0]), timeout=1)
+
+            release.set()
+            for record in records[3:]:
+                await service.submit("a", record)
+            await service.close()
+        results = await consumer
+
+        self.assertEqual(len(results["a"]), 6)
+        self.assertEqual(len(results["b"]), 1)
+
+    @async_test
+    async def test_socket_ingestion(self):
+        service = AnomalyService(make_config())
+        server = await service.serve()
+        port = server.sockets[0].getsockname()[1]
+        records = make_records(4, count=10)
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"not json\n")
+        for record in records:
+            writer.write(json.dumps({"stream": "socket", "record": record}).encode() + b"\n")
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+        results = []
+        async for stream, record, anomaly_score, _ in service.results():
+            results.append(anomaly_score)
+            if len(results) == len(records):
+                break
+        server.close()
+        await server.wait_closed()
+        await service.close()
+
+        expected, _ = HTMModel(make_config()).run(records)
+        np.testing.assert_array_equal(results, expected)
+
+    @async_test
+    async def test_model_errors_reach_consumers(self):
+        service = AnomalyService(make_config())
+        await service.submit("broken", {"value": 1.0})
+
+        with self.assertRaises(StreamError):
+            async for _ in service.results():
+                pass
+        await service.close()
+
+    @async_test
+    async def test_iteration_resumes_after_stream_error(self):
+        records = make_records(3, count=8)
+        service = AnomalyService(make_config(), max_batch_size=1)
+        await service.submit("broken", {"value": 1.0})
+        for record in records:
+            await service.submit("healthy", record)
+        await service.close()
+
+        results, errors = [], []
+        while True:
+            try:
+                async for stream, _, anomaly_score, _ in service.results():
+                    results.append(anomaly_score)
+                break
+            except StreamError as error:
+                errors.append(error.stream)
+
+        expected, _ = HTMModel(make_config()).run(records)
+        self.assertEqual(errors, ["broken"])
+        np.testing.assert_array_equal(results, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import unittest
+from unittest import mock
+import numpy as np
+from scipy import sparse
+from htm_py import spatial_pooler
+from htm_py.spatial_pooler import SpatialPooler
+
+
+def reference_overlaps(sp, inputVector):
+    inputVector = np.asarray(inputVector, dtype=np.float32)
+    return np.array([
+        np.sum(inputVector[pool][perms >= sp.synPermConnected])
+        for pool, perms in zip(sp.potentialPools, sp.permanences)
+    ])
+
+
+class TestSpatialPoolerOverlap(unittest.TestCase):
+    def make_sp(self):
+        return SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+
+    def make_inputs(self, count):
+        rng = np.random.default_rng(5)
+        inputs = np.zeros((count, 100), dtype=np.int64)
+        for row in inputs:
+            row[rng.choice(100, size=20, replace=False)] = 1
+        return inputs
+
+    def assert_overlaps_match_reference(self, sp):
+        for inputVector in self.make_inputs(30):
+            np.testing.assert_array_equal(
+                sp._compute_overlaps(inputVector.astype(np.float32)),
+                reference_overlaps(sp, inputVector)
+            )
+            sp.compute(inputVector, learn=True)
+
+    def test_dense_overlaps_match_per_column_sums(self):
+        sp = self.make_sp()
+        self.assertIsInstance(sp._connectedMatrix, np.ndarray)
+        self.assert_overlaps_match_reference(sp)
+
+    def test_sparse_overlaps_match_per_column_sums(self):
+        with mock.patch.object(spatial_pooler, "DENSE_OVERLAP_MAX_ENTRIES", 0):
+            sp = self.make_sp()
+        self.assertTrue(sparse.issparse(sp._connectedMatrix))
+        self.assert_overlaps_match_reference(sp)
+
+
+class TestSpatialPoolerConnectedUpdates(unittest.TestCase):
+    def test_learning_keeps_connected_structure_in_sync(self):
+        sp = SpatialPooler(inputDimensions=[50], columnDimensions=[32], synPermActiveInc=0.05, seed=1)
+        inputVector = np.zeros(50, dtype=np.int64)
+        inputVector[:15] = 1
+        before = sp._connectedMask.copy()
+
+        for _ in range(5):
+            sp.compute(inputVector, learn=True)
+
+        np.testing.assert_array_equal(sp._connectedMask, sp.permanences >= sp.synPermConnected)
+        self.assertTrue((sp._connectedMask != before).any())
+        for column, connected in enumerate(sp.get_connected_synapses()):
+            np.testing.assert_array_equal(np.flatnonzero(sp._connectedMatrix[column]), np.sort(connected))
+
+
+class TestSpatialPoolerSparseInput(unittest.TestCase):
+    def test_sparse_input_matches_dense_input(self):
+        dense_sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+        sparse_sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+        rng = np.random.default_rng(8)
+
+        for _ in range(20):
+            activeInputs = rng.choice(100, size=20, replace=False)
+            inputVector = np.zeros(100, dtype=np.int64)
+            inputVector[activeInputs] = 1
+
+            np.testing.assert_array_equal(
+                sparse_sp._compute_sparse_overlaps(np.sort(activeInputs)),
+                dense_sp._compute_overlaps(inputVector.astype(np.float32))
+            )
+            np.testing.assert_array_equal(
+                sparse_sp.compute_sparse(activeInputs, learn=True),
+                dense_sp.compute(inputVector, learn=True)
+            )
+        np.testing.assert_array_equal(sparse_sp.permanences, dense_sp.permanences)
+
+
+class TestSpatialPoolerLearning(unittest.TestCase):
+    def test_batched_adaptation_matches_per_column_updates(self):
+        sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+        inputVector = np.zeros(100, dtype=np.float32)
+        inputVector[10:40] = 1.0
+        active_columns = np.array([5, 17, 2, 40])
+
+        expected = sp.permanences.copy()
+        for i in active_columns:
+            inputBits = inputVector[sp.potentialPools[i]]
+            perms = expected[i] + sp.synPermActiveInc * inputBits
+            perms -= sp.synPermInactiveDec * (1 - inputBits)
+            expected[i] = np.clip(perms, 0.0, 1.0)
+
+        sp._adapt_permanences(inputVector, active_columns)
+        np.testing.assert_array_equal(sp.permanences, expected)
+
+    def test_underused_columns_are_boosted(self):
+        sp = SpatialPooler(
+            inputDimensions=[100], columnDimensions=[256], boostStrength=2.0, minPctDutyCycles=0.5, seed=3)
+        inputVector = np.zeros(100, dtype=np.int64)
+        inputVector[:30] = 1
+
+        for _ in range(3):
+            sp.compute(inputVector, learn=True)
+
+        self.assertAlmostEqual(sp.minDutyCycles[0], 0.5 * sp.activeDutyCycles.max())
+        never_active = sp.activeDutyCycles == 0
+        self.assertTrue(never_active.any())
+        np.testing.assert_allclose(sp.boostFactors[never_active], np.exp(2.0))
+        self.assertTrue((sp.boostFactors[sp.activeDutyCycles >= sp.minDutyCycles] == 1.0).all())
+
+
+class TestSpatialPoolerInhibition(unittest.TestCase):
+    def reference_local_winners(self, sp, overlaps, radius):
+        dims = sp.columnDimensions
+        coords = np.array(np.unravel_index(np.arange(sp.numColumns), dims)).T
+        winners = []
+        for column, coord in enumerate(coords):
+            neighbors = np.flatnonzero(np.all(np.abs(coords - coord) <= radius, axis=1))
+            bigger = [
+                n for n in neighbors
+                if overlaps[n] > overlaps[column] or (overlaps[n] == overlaps[column] and n < column)
+            ]
+            if len(bigger) < max(1, int(0.5 + sp.localAreaDensity * len(neighbors))):
+                winners.append(column)
+        return set(winners)
+
+    def test_local_inhibition_matches_neighborhood_rule(self):
+        for columnDimensions in ([60], [8, 12]):
+            sp = SpatialPooler(
+                inputDimensions=[100], columnDimensions=columnDimensions, globalInhibition=False,
+                localAreaDensity=0.2, inhibitionRadius=2, seed=3
+            )
+            overlaps = np.random.default_rng(4).integers(0, 6, size=sp.numColumns).astype(np.float32)
+
+            active = sp._inhibit_columns(overlaps)
+            self.assertEqual(set(active.tolist()), self.reference_local_winners(sp, overlaps, 2))
+            self.assertTrue((np.diff(overlaps[active]) <= 0).all())
+
+    def test_num_active_columns_is_configurable(self):
+        sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], numActiveColumnsPerInhArea=10, seed=3)
+        inputVector = np.zeros(100, dtype=np.int64)
+        inputVector[:30] = 1
+        self.assertEqual(len(sp.compute(inputVector)), 10)
+
+        sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], localAreaDensity=0.25, seed=3)
+        self.assertEqual(len(sp.compute(inputVector)), 16)
+
+    def test_small_density_keeps_at_least_one_winner(self):
+        inputVector = np.zeros(100, dtype=np.int64)
+        inputVector[:30] = 1
+
+        sp = SpatialPooler(inputDimensions=[100], columnDimensions=[256], localAreaDensity=0.001, seed=3)
+        self.assertEqual(len(sp.compute(inputVector)), 1)
+
+        sp = SpatialPooler(
+            inputDimensions=[100], columnDimensions=[256], globalInhibition=False,
+            localAreaDensity=0.001, inhibitionRadius=2, seed=3
+        )
+        overlaps = np.random.default_rng(4).integers(0, 6, size=sp.numColumns).astype(np.float32)
+        active = sp._inhibit_columns(overlaps)
+        self.assertGreater(len(active), 0)
+        self.assertEqual(set(active.tolist()), self.reference_local_winners(sp, overlaps, 2))
+
+    def test_local_inhibition_with_region_wide_radius_is_global(self):
+        sp = SpatialPooler(
+            inputDimensions=[100], columnDimensions=[64], globalInhibition=False,
+            numActiveColumnsPerInhArea=10, seed=3
+        )
+        self.assertFalse(sp._useLocalInhibition)
+
+
+class TestSpatialPoolerInitialization(unittest.TestCase):
+    def test_pools_are_compact_uniform_samples(self):
+        sp = SpatialPooler(inputDimensions=[200], columnDimensions=[500], potentialPct=0.5, seed=3)
+
+        self.assertEqual(sp.potentialPools.dtype, np.uint8)
+        self.assertEqual(sp.permanences.dtype, np.float32)
+        self.assertEqual(sp.potentialPools.shape, (500, 100))
+        for pool in sp.potentialPools:
+            self.assertEqual(len(np.unique(pool)), 100)
+        # Every input bit is in about half of the pools
+        counts = np.bincount(sp.potentialPools.ravel(), minlength=200)
+        self.assertTrue(np.all(np.abs(counts - 250) < 60))
+        self.assertTrue(np.all((sp.permanences >= 0.0) & (sp.permanences < 0.4)))
+
+    def test_potential_radius_gives_local_wrapping_pools(self):
+        sp = SpatialPooler(
+            inputDimensions=[100], columnDimensions=[10], potentialRadius=5, potentialPct=1.0, seed=3)
+
+        np.testing.assert_array_equal(np.sort(sp.potentialPools[0]), np.arange(11))
+        np.testing.assert_array_equal(
+            np.sort(sp.potentialPools[9]), np.sort(np.arange(90, 101) % 100))
+
+    def test_potential_radius_in_two_dimensions(self):
+        sp = SpatialPooler(
+            inputDimensions=[20, 20], columnDimensions=[10, 10], potentialRadius=1, potentialPct=1.0, seed=3)
+
+        self.assertEqual(sp.potentialPools.shape, (100, 9))
+        rows, cols = np.unravel_index(sp.potentialPools[11].astype(np.int64), (20, 20))
+        self.assertEqual(set(zip(rows.tolist(), cols.tolist())), {(r, c) for r in (2, 3, 4) for c in (2, 3, 4)})
+
+
+class TestSpatialPoolerBatch(unittest.TestCase):
+    def make_inputs(self, count):
+        rng = np.random.default_rng(6)
+        inputs = np.zeros((count, 100), dtype=np.int64)
+        for row in inputs:
+            row[rng.choice(100, size=25, replace=False)] = 1
+        return inputs
+
+    def assert_batch_matches_compute(self, sp):
+        inputs = self.make_inputs(50)
+        expected = [sp.compute(row, learn=False) for row in inputs]
+        actual = sp.compute_batch(inputs, learn=False)
+
+        self.assertEqual(len(actual), len(expected))
+        for a, e in zip(actual, expected):
+            np.testing.assert_array_equal(a, e)
+
+    def test_batch_inference_matches_compute(self):
+        self.assert_batch_matches_compute(
+            SpatialPooler(inputDimensions=[100], columnDimensions=[64], numActiveColumnsPerInhArea=8, seed=3))
+
+    def test_batch_inference_in_small_blocks_with_sparse_matrix(self):
+        with mock.patch.object(spatial_pooler, "DENSE_OVERLAP_MAX_ENTRIES", 0), \
+                mock.patch.object(spatial_pooler, "BATCH_OVERLAP_BLOCK_ENTRIES", 64 * 7):
+            sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], numActiveColumnsPerInhArea=8, seed=3)
+            self.assert_batch_matches_compute(sp)
+
+    def test_batch_inference_with_local_inhibition(self):
+        self.assert_batch_matches_compute(SpatialPooler(
+            inputDimensions=[100], columnDimensions=[64], globalInhibition=False,
+            localAreaDensity=0.1, inhibitionRadius=4, seed=3))
+
+    def test_batch_learning_runs_rows_in_order(self):
+        batch_sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+        single_sp = SpatialPooler(inputDimensions=[100], columnDimensions=[64], seed=3)
+        inputs = self.make_inputs(10)
+
+        actual = batch_sp.compute_batch(inputs, learn=True)
+        for row, a in zip(inputs, actual):
+            np.testing.assert_array_equal(a, single_sp.compute(row, learn=True))
+        np.testing.assert_array_equal(batch_sp.permanences, single_sp.permanences)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+from htm_py.temporal_memory import TemporalMemory
+
+
+class TestTemporalMemoryLimits(unittest.TestCase):
+    def setUp(self):
+        self.tm = TemporalMemory(
+            column_dimensions=[16],
+            cells_per_column=4,
+            activation_threshold=2,
+            initial_permanence=0.21,
+            connected_permanence=0.5,
+            min_threshold=1,
+            max_new_synapse_count=5,
+            permanence_increment=0.1,
+            permanence_decrement=0.1,
+            predicted_segment_decrement=0.01,
+            seed=42,
+            max_segments_per_cell=2,
+            max_synapses_per_segment=6
+        )
+
+    def test_least_recently_used_segment_is_evicted(self):
+        self.tm.iteration = 1
+        oldest = self.tm.create_segment(0)
+        self.tm.iteration = 2
+        newer = self.tm.create_segment(0)
+
+        # Using the oldest segment makes `newer` the eviction candidate
+        self.tm.iteration = 3
+        self.tm.connections.record_segment_usage([oldest], self.tm.iteration)
+
+        self.tm.iteration = 4
+        created = self.tm.create_segment(0)
+
+        segments = self.tm.connections.segments_for_cell(0)
+        self.assertEqual(len(segments), 2)
+        self.assertIn(oldest, segments)
+        self.assertIn(created, segments)
+        if created != newer:  # destroyed IDs may be reused
+            self.assertNotIn(newer, segments)
+
+    def test_weakest_synapses_are_evicted_when_segment_is_full(self):
+        connections = self.tm.connections
+        segment = self.tm.create_segment(0)
+        for presynaptic_cell, permanence in zip(range(10, 16), (0.9, 0.1, 0.8, 0.2, 0.7, 0.6)):
+            connections.create_synapse(segment, presynaptic_cell, permanence)
+
+        connections.grow_synapses_batch(
+            [segment], {20, 21}, 0.21, 2, max_synapses_per_segment=self.tm.max_synapses_per_segment)
+
+        presynaptic_cells = {
+            connections.synapse_data_for(synapse)[0]
+            for synapse in connections.synapses_for_segment(segment)
+        }
+        self.assertEqual(len(presynaptic_cells), 6)
+        self.assertEqual(presynaptic_cells, {10, 12, 14, 15, 20, 21})
+
+    def test_segment_count_stays_bounded_under_bursting(self):
+        for step in range(50):
+            self.tm.compute([step % 16, (step * 7) % 16], learn=True)
+
+        for cell in range(16 * 4):
+            self.assertLessEqual(self.tm.connections.num_segments(cell), self.tm.max_segments_per_cell)
+        for segment in self.tm.connections.segments():
+            self.assertLessEqual(
+                len(self.tm.connections.synapses_for_segment(segment)), self.tm.max_synapses_per_segment)
+
+
+class TestTemporalMemoryPredictiveCache(unittest.TestCase):
+    def setUp(self):
+        self.tm = TemporalMemory(
+            column_dimensions=[8],
+            cells_per_column=4,
+            activation_threshold=2,
+            initial_permanence=0.21,
+            connected_permanence=0.5,
+            min_threshold=1,
+            max_new_synapse_count=5,
+            permanence_increment=0.1,
+            permanence_decrement=0.1,
+            predicted_segment_decrement=0.0,
+            seed=42
+        )
+
+    def test_predictive_state_cached_by_activate_dendrites(self):
+        connections = self.tm.connections
+        segment = connections.create_segment(9)  # column 2
+        for presynaptic_cell in (0, 1):
+            connections.create_synapse(segment, presynaptic_cell, 0.6)
+
+        self.tm.active_cells = {0, 1}
+        self.tm.activate_dendrites(learn=False)
+
+        self.assertEqual(self.tm.predictive_cells.tolist(), [9])
+        self.assertEqual(self.tm.predictive_columns.tolist(), [2])
+        self.assertEqual(self.tm.predictive_column_mask.tolist(), [c == 2 for c in range(8)])
+        self.assertEqual(self.tm.get_predictive_cells(), {9})
+        with self.assertRaises(ValueError):
+            self.tm.predictive_cells[0] = 1
+
+        self.assertEqual(self.tm.anomaly_score([2, 5]), 0.5)
+
+    def test_check_inputs_rejects_out_of_range_columns(self):
+        self.tm.check_inputs = True
+        with self.assertRaises(ValueError):
+            self.tm.compute([8])
+
+
+class TestTemporalMemoryGarbageCollection(unittest.TestCase):
+    def test_scheduled_gc_remaps_segment_state(self):
+        tm = TemporalMemory(
+            column_dimensions=[16],
+            cells_per_column=4,
+            activation_threshold=2,
+            initial_permanence=0.21,
+            connected_permanence=0.2,
+            min_threshold=1,
+            max_new_synapse_count=5,
+            permanence_increment=0.1,
+            permanence_decrement=0.1,
+            predicted_segment_decrement=0.05,
+            seed=42,
+            gc_interval=5
+        )
+        sequence = [[0, 1], [2, 3], [4, 5], [6, 7]]
+        for step in range(40):
+            tm.compute(sequence[step % len(sequence)], learn=True)
+
+            connections = tm.connections
+            for segment in tm.active_segments | tm.matching_segments:
+                self.assertIn(segment, connections.segment_to_synapses)
+            if (step + 1) % 5 == 0:
+                self.assertEqual(sorted(connections.segments()), list(range(len(connections.segments()))))
+                self.assertTrue(all(connections.synapses_for_segment(s) for s in connections.segments()))
+                self.assertTrue((connections.permanences() > 0.0).all())
+
+
+class TestTemporalMemoryDenseCellState(unittest.TestCase):
+    def make_tm(self, dense_cell_state):
+        return TemporalMemory(
+            column_dimensions=[32],
+            cells_per_column=4,
+            activation_threshold=3,
+            initial_permanence=0.21,
+            connected_permanence=0.2,
+            min_threshold=2,
+            max_new_synapse_count=6,
+            permanence_increment=0.1,
+            permanence_decrement=0.05,
+            predicted_segment_decrement=0.01,
+            seed=7,
+            dense_cell_state=dense_cell_state
+        )
+
+    def run_sequence(self, dense_cell_state):
+        tm = self.make_tm(dense_cell_state)
+        sequence = [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11], [12, 13, 14, 15]]
+        history = []
+        for step in range(40):
+            score = tm.compute(sequence[step % len(sequence)])
+            history.append((score, sorted(tm.active_cells), sorted(tm.winner_cells)))
+        return history
+
+    def test_dense_cell_state_matches_set_state(self):
+        self.assertEqual(self.run_sequence(True), self.run_sequence(False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import threading
+import tempfile
+import unittest
+from htm_py.tracing import CSVTracer, NULL_TRACER, DETAIL, SUMMARY, stream_config, tracer_from_config
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_lines(self, event):
+        with open(os.path.join(self.directory, f"{event}.csv")) as f:
+            return f.read().splitlines()
+
+    def test_null_tracer_is_disabled(self):
+        self.assertFalse(NULL_TRACER.enabled("tm_phase_trace"))
+        self.assertIs(tracer_from_config(None), NULL_TRACER)
+
+    def test_csv_tracer_writes_header_and_buffered_rows(self):
+        tracer = CSVTracer(self.directory, level=DETAIL, batch_size=2)
+        tracer.emit("tm_segment_growth_trace", (0, 40, 1240, 0.24))
+        tracer.emit_rows("tm_phase_trace", [(1, "Phase2", "BurstWinnerCell", 7, None, "burst")])
+        tracer.close()
+
+        self.assertEqual(self.read_lines("tm_segment_growth_trace"), [
+            "timestep,total_segments,total_synapses,avg_permanence",
+            "0,40,1240,0.2400",
+        ])
+        self.assertEqual(self.read_lines("tm_phase_trace"), [
+            "timestep,phase,event,cell,segment,info",
+            "1,Phase2,BurstWinnerCell,7,,burst",
+        ])
+
+    def test_level_and_event_filtering(self):
+        summary = CSVTracer(self.directory, level=SUMMARY)
+        self.assertTrue(summary.enabled("tm_segment_growth_trace"))
+        self.assertFalse(summary.enabled("segment_adapt_debug"))
+        summary.close()
+
+        selected = CSVTracer(self.directory, level=DETAIL, events=["segment_adapt_debug"])
+        self.assertTrue(selected.enabled("segment_adapt_debug"))
+        self.assertFalse(selected.enabled("tm_phase_trace"))
+        selected.close()
+
+        with self.assertRaises(ValueError):
+            CSVTracer(self.directory, events=["not_an_event"])
+
+    def test_flush_after_close_returns(self):
+        tracer = CSVTracer(self.directory)
+        self.assertIsNone(tracer._writer)
+        tracer.emit("sp_active_columns_trace", (0, 40))
+        tracer.close()
+
+        flusher = threading.Thread(target=tracer.flush, daemon=True)
+        flusher.start()
+        flusher.join(timeout=5)
+        self.assertFalse(flusher.is_alive())
+        self.assertFalse(tracer._writer.is_alive())
+
+    def test_stream_configs_trace_to_separate_files(self):
+        config = {"trace": {"directory": self.directory}}
+        tracers = [tracer_from_config(stream_config(config, stream)["trace"]) for stream in ("a", "b/c")]
+        for timestep, tracer in enumerate(tracers):
+            tracer.emit("sp_active_columns_trace", (timestep, 40))
+            tracer.close()
+
+        self.assertNotIn("prefix", config["trace"])
+        self.assertEqual(self.read_lines("a.sp_active_columns_trace")[1:], ["0,40"])
+        self.assertEqual(self.read_lines("b_c.sp_active_columns_trace")[1:], ["1,40"])
+        self.assertEqual(stream_config({}, "a"), {})
+
+
+if __name__ == '__main__':
+    unittest.main()